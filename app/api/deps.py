@@ -1,5 +1,8 @@
 from typing import Generator
+from fastapi import HTTPException
+from app.core.config import settings
 from app.db.session import SessionLocal
+from app.ml.model_loader import preload_status
 
 def get_db() -> Generator:
     """
@@ -10,4 +13,14 @@ def get_db() -> Generator:
         db = SessionLocal()
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def require_models():
+    """Rejects inference requests (503) until the startup preload has finished."""
+    if settings.MODEL_SERVER_ENABLED:
+        return
+    status = preload_status()["status"]
+    if status == "failed":
+        raise HTTPException(status_code=503, detail="Model preload failed, see /health/ready.")
+    if status != "ready":
+        raise HTTPException(status_code=503, detail="Models are still loading.", headers={"Retry-After": "5"})
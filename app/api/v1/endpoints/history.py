@@ -0,0 +1,69 @@
+import base64
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.api.deps import get_db
+from app.db.repositories import get_history_page, get_record
+from app.schemas.history import HistoryPage, HistoryRecord
+
+router = APIRouter()
+
+STATUSES = ("MATCH", "PARTIAL", "MISMATCH", "ERROR")
+
+def _encode_cursor(row):
+    raw = f"{row.timestamp.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, record_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(record_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+def _to_utc_naive(value):
+    # Timestamps are stored as naive UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+@router.get("/history", response_model=HistoryPage)
+def list_history(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Verification history, newest first.
+    Filter by overall `status` and by `date_from` (inclusive) / `date_to` (exclusive).
+    Follow `next_cursor` for older pages.
+    """
+    if status is not None:
+        status = status.upper()
+        if status not in STATUSES:
+            raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(STATUSES)}.")
+
+    rows, has_more = get_history_page(
+        db,
+        limit=limit,
+        after=_decode_cursor(cursor) if cursor else None,
+        status=status,
+        date_from=_to_utc_naive(date_from),
+        date_to=_to_utc_naive(date_to)
+    )
+    return {
+        "items": [row._asdict() for row in rows],
+        "next_cursor": _encode_cursor(rows[-1]) if has_more else None
+    }
+
+@router.get("/history/{record_id}", response_model=HistoryRecord)
+def get_history_record(record_id: int, db: Session = Depends(get_db)):
+    record = get_record(db, record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Record not found.")
+    return record
@@ -0,0 +1,55 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.api.deps import get_db
+from app.db.repositories import get_error_rollups
+from app.db.rollups import TOTAL
+from app.schemas.stats import StatsResponse
+
+router = APIRouter()
+
+MAX_RANGE_DAYS = 366
+
+def _bucket(day, counts):
+    verifications = counts.get(TOTAL, 0)
+    errors = {k: v for k, v in counts.items() if k != TOTAL}
+    return {
+        "date": day,
+        "verifications": verifications,
+        "errors": errors,
+        "rates": {k: round(v / verifications, 4) if verifications else 0.0 for k, v in errors.items()}
+    }
+
+@router.get("/stats", response_model=StatsResponse)
+def error_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    days: int = Query(30, ge=1, le=MAX_RANGE_DAYS),
+    db: Session = Depends(get_db)
+):
+    """
+    Daily error-taxonomy counts and rates (UTC days, both ends inclusive).
+    Reads only the pre-aggregated rollup table.
+    Defaults to the last `days` days.
+    """
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=days - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to.")
+    if (date_to - date_from).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days.")
+
+    per_day = defaultdict(dict)
+    totals = defaultdict(int)
+    for bucket, error_type, occurrences in get_error_rollups(db, date_from, date_to):
+        per_day[bucket][error_type] = occurrences
+        totals[error_type] += occurrences
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "buckets": [_bucket(day, counts) for day, counts in sorted(per_day.items())],
+        "totals": _bucket(date_from, totals)
+    }
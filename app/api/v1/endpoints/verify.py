@@ -1,17 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+import logging
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from app.api.deps import get_db
+from app.api.deps import get_db, require_models
 from app.services.verifier import process_verification
+from app.services.admission import inference_gate, QueueFullError
+from app.services.batch import BatchJob, BatchInputError, stream_batch
 from app.schemas.verification import VerificationResponse
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.post("/verify", response_model=VerificationResponse)
+@router.post("/verify", response_model=VerificationResponse, dependencies=[Depends(require_models)])
 def verify_id(
+    response: Response,
     file: UploadFile = File(...),
     name: str = Form(...),
     id_number: str = Form(...),
     dob: str = Form(...),
+    debug: bool = Form(False),
     db: Session = Depends(get_db)
 ):
     # 1. Validation
@@ -19,20 +27,68 @@ def verify_id(
     if file.content_type and not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image.")
     
-    # 2. Call Service
+    # 2. Call Service (through the bounded inference queue)
     try:
         # Read file into memory (be careful with large files in prod, but ok for ID cards)
         file_bytes = file.file.read()
         
-        result = process_verification(
-            file_bytes=file_bytes,
-            user_data={"name": name, "id_number": id_number, "dob": dob},
-            db=db,
-            filename=file.filename
-        )
+        with inference_gate.slot() as waited:
+            result = process_verification(
+                file_bytes=file_bytes,
+                user_data={"name": name, "id_number": id_number, "dob": dob},
+                db=db,
+                filename=file.filename,
+                debug=debug
+            )
+        response.headers["X-Queue-Wait-Ms"] = str(round(waited * 1000))
         return result
 
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
     except Exception as e:
-        # Log this error in production!
-        print(f"Error processing request: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.exception("Verification failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/verify/batch", dependencies=[Depends(require_models)])
+def verify_batch(
+    request: Request,
+    archive: Optional[UploadFile] = File(None),
+    files: Optional[List[UploadFile]] = File(None),
+    manifest: Optional[UploadFile] = File(None)
+):
+    """
+    Bulk verification.
+    Send either a zip `archive` (with manifest.csv/json inside, or a separate `manifest`),
+    or many `files` plus a `manifest` (filename,name,id_number,dob).
+    Streams one BatchItemResult per line (NDJSON) as each item finishes.
+    """
+    try:
+        if archive is not None:
+            job = BatchJob.from_archive(
+                archive.file,
+                manifest_file=manifest.file if manifest else None,
+                manifest_name=manifest.filename if manifest else None
+            )
+        elif files and manifest is not None:
+            job = BatchJob.from_files(files, manifest.file, manifest.filename or "manifest.csv")
+        else:
+            raise BatchInputError("Send a zip 'archive', or 'files' together with a 'manifest'.")
+    except (BatchInputError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(stream_batch(job, request), media_type="application/x-ndjson")
+
+@router.get("/verify/queue")
+def queue_status():
+    """
+    Queue depth and wait times for load balancers.
+    Returns 503 while the queue is saturated so new traffic can be shed early.
+    """
+    stats = inference_gate.stats()
+    status_code = 503 if inference_gate.is_saturated() else 200
+    return JSONResponse(status_code=status_code, content=stats)
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,11 +9,123 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_WRITE_MODE: str = "sync"          # "sync" | "write_behind" (queued bulk inserts)
+    DB_WRITE_BATCH_SIZE: int = 50
+    DB_WRITE_FLUSH_SECONDS: float = 1.0
+    DB_WRITE_QUEUE_SIZE: int = 10000
     
+    # Image Decode
+    MAX_IMAGE_DIMENSION: int = 1800
+    FAST_DECODE: bool = True  # JPEG DCT-domain downscale instead of full decode + resize
+
+    # Calendar (pre-generated AD<->BS table, built on first use if missing)
+    BS_CALENDAR_TABLE_PATH: Optional[str] = None
+
     # ML
     YOLO_MODEL_PATH: str
     USE_GPU: bool = False
+
+    # YOLO Backend ("torch" runs the .pt; "onnx" / "openvino" run a graph exported from it)
+    YOLO_BACKEND: str = "torch"
+    YOLO_EXPORT_DIR: str = "models/exported"   # Export cache, keyed by the .pt contents
+    YOLO_IMGSZ: Optional[int] = None           # Inference size, None = the checkpoint's training size
+    # "onnx_int8" runs the statically quantized graph made by `python -m app.ml.quantize yolo`
+
+    # YOLO Cascade: a cheap low-res pass finds the card boundaries, then only the
+    # card crops get a pass at the resolution that resolves text blocks
+    YOLO_CASCADE_ENABLED: bool = False
+    YOLO_COARSE_IMGSZ: int = 320    # Boundary pass on the whole image
+    YOLO_FINE_IMGSZ: Optional[int] = None  # Region pass on each card crop, None = as YOLO_IMGSZ
+    YOLO_CASCADE_PAD: float = 0.04  # Crop margin around a boundary (fraction of its size)
+
+    # Startup
+    MODEL_PRELOAD_PARALLEL: bool = True  # Load YOLO + OCR engines concurrently
+    MODEL_WARMUP: bool = True            # One synthetic inference per engine before reporting ready
+
+    # YOLO Micro-batching (one forward pass shared by concurrent requests)
+    YOLO_MICROBATCH_ENABLED: bool = False
+    YOLO_MAX_BATCH: int = 4         # Images per batched predict
+    YOLO_MAX_WAIT_MS: float = 10.0  # How long the first image waits for company
+
+    # OCR Batching
+    OCR_BATCH_SIZE: int = 8       # Crops sent to one engine call
+    OCR_REC_BATCH_NUM: int = 8    # Text lines per recognition forward pass
+
+    # OCR Mode
+    # "det_rec":  Paddle runs its own text detector on every YOLO crop
+    # "rec_only": YOLO crops are split into lines and sent straight to recognition
+    OCR_MODE: str = "det_rec"
+    OCR_REC_MODEL_NE: str = "devanagari_PP-OCRv5_mobile_rec"
+    OCR_REC_MODEL_EN: str = "en_PP-OCRv5_mobile_rec"
+    OCR_REC_MIN_CONFIDENCE: float = 0.6  # Below this, fall back to det+rec
+    # Local recognition model dirs, e.g. INT8 models from `python -m app.ml.quantize rec`
+    # (None = the official model downloaded by PaddleOCR)
+    OCR_REC_MODEL_DIR_NE: Optional[str] = None
+    OCR_REC_MODEL_DIR_EN: Optional[str] = None
+
+    # Early-exit Audit: OCR the regions in waves (front first, top to bottom) and skip
+    # the rest once name, ID number and DOB all MATCH. Fewer crops OCRed, but the
+    # waves run one after another. Truncated results are never cached.
+    AUDIT_EARLY_EXIT: bool = False
+    AUDIT_WAVE_SIZE: int = 4                    # Regions OCRed before the fields are re-checked
+    AUDIT_FACE_ORDER: str = "front,back"        # Faces not listed go last
+
+    # Inference Executors (threads per OCR engine, each extra worker loads its own model copy)
+    OCR_WORKERS_NE: int = 1
+    OCR_WORKERS_EN: int = 1
+
+    # CPU Topology (each library's thread pools sized to this worker's share of the cores,
+    # see app/core/topology.py)
+    WEB_CONCURRENCY: int = 1       # Worker processes per node (gunicorn reads the same variable)
+    WORKER_CPU_BUDGET: int = 0     # Cores per worker, 0 = usable cores / WEB_CONCURRENCY
+    CPU_AFFINITY: bool = False     # Pin each worker to its own block of cores (Linux)
+    CPU_SLOT_DIR: str = "/tmp/nepal-id-cpu-slots"  # Lock files that hand out the core blocks
+    # Pre-fork: gunicorn loads the models once in the master and forks the workers,
+    # which share the weights copy-on-write (gunicorn.conf.py, app/core/prefork.py)
+    PREFORK_MODELS: bool = False
+
+    # Admission Control (/verify)
+    # Keep MAX_INFLIGHT_JOBS + MAX_QUEUE_DEPTH below Starlette's threadpool size (40)
+    MAX_INFLIGHT_JOBS: int = 2
+    MAX_QUEUE_DEPTH: int = 8
+    QUEUE_TIMEOUT_SECONDS: float = 30.0
+
+    # Model Server (out-of-process inference, see app/ml/model_server.py)
+    MODEL_SERVER_ENABLED: bool = False
+    # The manager unpickles what it receives: the socket lives in a private (0700)
+    # directory, and both sides refuse to run without a real shared secret
+    MODEL_SERVER_ADDRESS: str = "/tmp/nepal-id-models/models.sock"  # Unix socket, local only
+    MODEL_SERVER_AUTHKEY: Optional[str] = None   # Required, at least 16 characters
+    MODEL_SERVER_WORKERS: int = 1
+
+    # Bulk Verification (/verify/batch)
+    BATCH_WORKERS: int = 2
+    BATCH_MAX_ITEMS: int = 5000
+    BATCH_MAX_ARCHIVE_ENTRIES: int = 10000   # Every zip member, images or not
+    BATCH_MAX_UPLOAD_MB: int = 2048          # Archive / files as uploaded (spooled to disk)
+    BATCH_MAX_UNCOMPRESSED_MB: int = 4096    # Sum of the members that will be read
+    BATCH_MAX_ITEM_MB: int = 25              # One image (or manifest) inside the archive
+
+    # Result Cache (OCR results of re-submitted images, only the audit re-runs on a hit)
+    # Off by default: entries hold card text (PII) for the TTL
+    RESULT_CACHE_ENABLED: bool = False
+    RESULT_CACHE_TTL_SECONDS: int = 3600
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESULT_CACHE_PHASH: bool = False          # Also match re-encoded copies of a scan
+    RESULT_CACHE_PHASH_MAX_TILE_DIFF: float = 10.0  # Confirmation: max mean gray difference of any tile
+    RESULT_CACHE_PATH: Optional[str] = None   # SQLite file for a tier that survives restarts
+
+    # Debug Crops (off by default; per request via the `debug` form field, or sampled)
+    DEBUG_CROPS_SAMPLE_RATE: float = 0.0   # Fraction of requests captured automatically
+    DEBUG_CROPS_DIR: str = "debug_crops"
+    DEBUG_CROPS_QUEUE_SIZE: int = 256      # Full queue = crops dropped, never blocks
+    DEBUG_CROPS_MAX_MB: int = 500
+    DEBUG_CROPS_MAX_AGE_HOURS: float = 72.0
     
+    # Logging ("json": one object per line with the request id, "text": readable)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+
     # Flags
     KMP_DUPLICATE_LIB_OK: str = "TRUE"
     
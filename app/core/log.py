@@ -0,0 +1,54 @@
+"""
+Logging setup for the `app.*` loggers.
+LOG_FORMAT="json" writes one JSON object per line (with the request id of the
+current request, and any `extra=` fields); "text" is the readable form for dev.
+"""
+import json
+import logging
+import sys
+from app.core.config import settings
+from app.core.metrics import current_trace
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+def _extras(record):
+    return {k: v for k, v in vars(record).items() if k not in _RESERVED}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace = current_trace()
+        if trace is not None:
+            payload["request_id"] = trace.request_id
+        payload.update(_extras(record))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        trace = current_trace()
+        extras = _extras(record)
+        if trace is not None:
+            extras = {"request_id": trace.request_id, **extras}
+        if extras:
+            line += " " + " ".join(f"{k}={json.dumps(v, ensure_ascii=False, default=str)}" for k, v in extras.items())
+        return line
+
+def configure_logging():
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+    logger = logging.getLogger("app")
+    logger.handlers[:] = [handler]
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.propagate = False
@@ -0,0 +1,173 @@
+"""
+In-process metrics in the Prometheus text format (served at /metrics), plus
+per-request traces for the structured request log.
+
+No client library: counters and histograms are a dict of label values -> numbers
+behind one lock. Each process keeps its own numbers (scrape every worker, or
+run one worker per pod).
+
+    with stage("detect"):          # histogram nid_stage_seconds{stage="detect"}
+        ...                        # and "detect" in the current request's trace
+    FACES_DETECTED.inc(face="front")
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+_LOCK = threading.Lock()
+_REGISTRY = []
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        with _LOCK:
+            _REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with _LOCK:
+            items = sorted(self._values.items())
+            lines += self._render_items(items)
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_items(self, items):
+        return [f"{self.name}{_label_str(self.labels, key)} {_format(value)}" for key, value in items]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _LOCK:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_items(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="' + _format(bound if bound == math.inf else float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_format(total)}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {count}")
+        return lines
+
+def render():
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    with _LOCK:
+        metrics = list(_REGISTRY)
+    lines = []
+    for metric in metrics:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+# --- Metrics ---
+
+HTTP_REQUEST_SECONDS = Histogram("nid_http_request_seconds", "HTTP request latency.", ("method", "route", "status"))
+STAGE_SECONDS = Histogram("nid_stage_seconds", "Latency of each verification stage.", ("stage",))
+OCR_ENGINE_SECONDS = Histogram("nid_ocr_engine_seconds", "Latency of one OCR engine call (a chunk of crops).", ("engine",))
+OCR_CROPS = Counter("nid_ocr_crops_total", "Crops sent to each OCR engine.", ("engine",))
+OCR_CONF_FLAGS = Counter("nid_ocr_conf_flag_total", "OCR results by confidence flag.", ("flag",))
+REGIONS_PER_CARD = Histogram("nid_regions_per_card", "Detected regions per card.", ("face",), buckets=COUNT_BUCKETS)
+FACES_DETECTED = Counter("nid_faces_detected_total", "Cards detected, by face.", ("face",))
+SMART_SPLITS = Counter("nid_smart_split_total", "Composite images split into front + back.")
+AUDIT_SKIPPED_REGIONS = Counter("nid_audit_skipped_regions_total", "Text regions not OCRed thanks to the early-exit audit.", ("face",))
+VERIFICATIONS = Counter("nid_verifications_total", "Verifications by overall status.", ("status", "cache_hit"))
+
+# --- Request traces ---
+
+_TRACE = contextvars.ContextVar("nid_trace", default=None)
+
+class RequestTrace:
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.stages = {}   # stage -> ms (summed if a stage runs more than once)
+        self.fields = {}   # extra facts for the request log line
+
+def start_trace(request_id):
+    trace = RequestTrace(request_id)
+    return trace, _TRACE.set(trace)
+
+def end_trace(token):
+    _TRACE.reset(token)
+
+def current_trace():
+    return _TRACE.get()
+
+def annotate(**fields):
+    """
+    Adds facts (counts, flags) to the current request's log line.
+    Names must not be LogRecord attributes (filename, name, module...): logging rejects those.
+    """
+    trace = _TRACE.get()
+    if trace is not None:
+        trace.fields.update(fields)
+
+@contextmanager
+def stage(name):
+    """Times a block into nid_stage_seconds and the current request trace."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        trace = _TRACE.get()
+        if trace is not None:
+            trace.stages[name] = round(trace.stages.get(name, 0.0) + elapsed * 1000, 2)
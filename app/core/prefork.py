@@ -0,0 +1,89 @@
+"""
+Pre-fork serving (PREFORK_MODELS, wired up in gunicorn.conf.py).
+
+The gunicorn master imports the app, loads every model once, then forks the
+workers. The model weights are shared copy-on-write instead of each worker
+loading its own copy, so RSS no longer grows with the worker count.
+
+The master only loads: no inference runs before the fork. The first inference
+starts the OpenMP/BLAS (and Paddle) thread pools, and a pool started in the
+master is unusable in a forked child (only the forking thread survives, so the
+child can hang on the first parallel op). Each worker runs the warm-up itself
+in the background after the fork; /health/ready stays red until it is done.
+With MODEL_SERVER_ENABLED the workers don't hold models, so nothing is loaded.
+
+Fork-safety: only the forking thread survives in a child, so everything that
+owns threads, locks or sockets is rebuilt in `after_fork()`: OCR executors,
+the YOLO micro-batcher, the SQLAlchemy pool, the SQLite cache connection and
+the CPU affinity slot. The writers (DB write-behind, debug crops) only start
+their threads inside the workers.
+"""
+import gc
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def load_in_master():
+    """Runs in the gunicorn master before the first fork."""
+    from app.core import topology
+    from app.core.config import settings
+    from app.ml.model_loader import preload_models
+
+    if settings.MODEL_SERVER_ENABLED:
+        logger.info("Model server enabled, nothing to load before fork")
+    else:
+        # Load only; the warm-up runs in each worker (see above)
+        preload_models(warmup=False)
+    # The master serves nothing; its core block goes back to the workers
+    topology.release()
+
+    # Everything allocated so far moves to a permanent generation the collector never
+    # scans, so it doesn't touch (and copy) the shared pages in every worker
+    gc.collect()
+    gc.freeze()
+    logger.info("Models loaded in master", extra={"memory": memory_usage(), "frozen_objects": gc.get_freeze_count()})
+
+def after_fork():
+    """Runs in each worker right after the fork."""
+    from app.core import topology
+    from app.core.config import settings
+    from app.db.session import engine
+    from app.ml.ocr.executor import shutdown_executors
+    from app.services.cache import result_cache
+
+    # Pooled connections belong to the master: forget them without closing its sockets
+    engine.dispose(close=False)
+    # Executor threads didn't survive the fork; drop them, new ones start on first use
+    shutdown_executors(wait=False)
+    if not settings.MODEL_SERVER_ENABLED:
+        from app.ml.detection.yolo import reset_batcher
+        reset_batcher()
+    if result_cache is not None:
+        result_cache.reopen()
+    topology.configure()
+
+def memory_usage():
+    """
+    This process's memory in MB from /proc/self/smaps_rollup (Linux):
+    `unique` (USS) is only ours, `shared` is also mapped by other processes
+    (the master's model pages in pre-fork mode). None elsewhere.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        "pid": os.getpid(),
+        "rss_mb": mb(fields.get("Rss", 0)),
+        "pss_mb": mb(fields.get("Pss", 0)),
+        "unique_mb": mb(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)),
+        "shared_mb": mb(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)),
+    }
@@ -0,0 +1,158 @@
+"""
+CPU topology: gives every worker process a core budget and sizes each library's
+thread pool to it, so N gunicorn workers don't each start one thread per core
+in OpenMP/BLAS, PyTorch, OpenCV and Paddle.
+
+    budget = WORKER_CPU_BUDGET or (usable cores // WEB_CONCURRENCY)
+
+The model server's inference processes split the cores the same way, by
+MODEL_SERVER_WORKERS instead (`set_process_count`).
+
+The BLAS/OpenMP pools read their size from the environment when the library is
+first imported, so `apply_thread_env()` runs before numpy / cv2 / torch /
+paddle are imported (top of app/main.py). `configure()` then sets the runtime
+knobs and, with CPU_AFFINITY, pins the worker to its own block of cores.
+Variables already set in the environment are left alone.
+"""
+import fcntl
+import logging
+import os
+import sys
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS",
+)
+
+_STATE = {"cores": None, "affinity": None, "slot": None, "slot_file": None, "processes": None}
+
+def usable_cores():
+    """Cores this process could run on before pinning (respects taskset / container cpusets)."""
+    if _STATE["cores"] is None:
+        if hasattr(os, "sched_getaffinity"):
+            _STATE["cores"] = sorted(os.sched_getaffinity(0))
+        else:
+            _STATE["cores"] = list(range(os.cpu_count() or 1))
+    return _STATE["cores"]
+
+def set_process_count(processes):
+    """How many processes share the cores, when it isn't WEB_CONCURRENCY (the model server pool)."""
+    _STATE["processes"] = processes
+
+def process_count():
+    return max(1, _STATE["processes"] or settings.WEB_CONCURRENCY)
+
+def core_budget():
+    if settings.WORKER_CPU_BUDGET > 0:
+        return settings.WORKER_CPU_BUDGET
+    return max(1, len(usable_cores()) // process_count())
+
+def ocr_threads():
+    """Paddle threads per OCR engine: the NE and EN engines run side by side."""
+    engines = max(1, settings.OCR_WORKERS_NE) + max(1, settings.OCR_WORKERS_EN)
+    return max(1, core_budget() // engines)
+
+def apply_thread_env():
+    """Sizes the OpenMP/BLAS pools. Only effective before those libraries are imported."""
+    budget = str(core_budget())
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, budget)
+
+def _claim_slot(slots):
+    """Holds a lock file for the first free slot until the process exits."""
+    os.makedirs(settings.CPU_SLOT_DIR, exist_ok=True)
+    for slot in range(slots):
+        handle = open(os.path.join(settings.CPU_SLOT_DIR, f"slot-{slot}.lock"), "w")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            continue
+        _STATE["slot_file"] = handle
+        return slot
+    return None
+
+def _pin():
+    cores = usable_cores()
+    budget = core_budget()
+    slots = max(1, len(cores) // budget)
+
+    slot = _STATE["slot"]
+    if slot is None:
+        slot = _claim_slot(slots)
+    if slot is None:
+        logger.warning(f"CPU_AFFINITY: all {slots} core slots are taken, worker left unpinned")
+        return
+
+    pinned = cores[slot * budget:(slot + 1) * budget]
+    # Threads started from here on (OpenMP, executors) inherit the mask
+    os.sched_setaffinity(0, pinned)
+    _STATE["slot"] = slot
+    _STATE["affinity"] = pinned
+
+def _set_library_threads(inference):
+    budget = core_budget()
+
+    import cv2
+    cv2.setNumThreads(budget)
+
+    if not inference:
+        return   # API worker using the model server: don't load torch just to size it
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(budget)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass   # Only settable before the first parallel op; already fixed in this process
+
+def configure(inference=None):
+    """
+    Applies the budget to this process. Called at startup (and again in each forked worker).
+    `inference`: this process runs the models; by default unless MODEL_SERVER_ENABLED.
+    """
+    if inference is None:
+        inference = not settings.MODEL_SERVER_ENABLED
+    apply_thread_env()
+    # Core blocks go to the processes that run the models (not to API workers in front of a model server)
+    if settings.CPU_AFFINITY and inference and hasattr(os, "sched_setaffinity"):
+        _pin()
+    _set_library_threads(inference)
+
+    info = report()
+    logger.info("CPU topology", extra={"topology": info})
+    return info
+
+def release():
+    """Gives up this process's core block (the pre-fork master, before its workers claim theirs)."""
+    if _STATE["slot_file"] is not None:
+        _STATE["slot_file"].close()   # Releases the flock
+    if _STATE["affinity"] is not None:
+        os.sched_setaffinity(0, usable_cores())
+    _STATE.update(slot=None, affinity=None, slot_file=None)
+
+def report():
+    """Effective settings, for the startup log and /health/ready."""
+    import cv2
+
+    info = {
+        "pid": os.getpid(),
+        "usable_cores": len(usable_cores()),
+        "workers": process_count(),
+        "core_budget": core_budget(),
+        "ocr_threads_per_engine": ocr_threads(),
+        "env": {var: os.environ.get(var) for var in THREAD_ENV_VARS},
+        "cv2_threads": cv2.getNumThreads(),
+        "torch_threads": None,
+        "affinity_slot": _STATE["slot"],
+        "affinity": _STATE["affinity"],
+    }
+    torch = sys.modules.get("torch")   # Only report it where it is loaded
+    if torch is not None:
+        info["torch_threads"] = torch.get_num_threads()
+    return info
@@ -0,0 +1,46 @@
+"""
+One-time rebuild of `error_rollups` from existing verification_history rows.
+
+    python -m app.db.backfill_rollups
+
+Reads only (timestamp, taxonomy) in id-ordered chunks, then replaces the
+rollup table in a single transaction. Run it before the rollups go live or
+while no verifications are being written (writes that land mid-run are not counted).
+"""
+from collections import Counter
+from sqlalchemy import delete
+from app.db.session import SessionLocal, engine, Base
+from app.db.migrations import upgrade_schema
+from app.db.models import ErrorRollup, VerificationRecord
+from app.db.rollups import apply_rollups, rollup_deltas
+
+CHUNK_SIZE = 1000
+
+def backfill(db):
+    deltas = Counter()
+    last_id, scanned = 0, 0
+    while True:
+        rows = db.query(VerificationRecord.id, VerificationRecord.timestamp, VerificationRecord.taxonomy) \
+            .filter(VerificationRecord.id > last_id) \
+            .order_by(VerificationRecord.id) \
+            .limit(CHUNK_SIZE).all()
+        if not rows:
+            break
+        deltas.update(rollup_deltas((row.timestamp, row.taxonomy) for row in rows))
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+    db.execute(delete(ErrorRollup))
+    apply_rollups(db, deltas)
+    db.commit()
+    return scanned, len(deltas)
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    db = SessionLocal()
+    try:
+        scanned, rollup_rows = backfill(db)
+        print(f"Backfilled {rollup_rows} rollup rows from {scanned} verification records.")
+    finally:
+        db.close()
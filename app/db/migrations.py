@@ -0,0 +1,83 @@
+"""
+Minimal in-place schema upgrades.
+`Base.metadata.create_all` only creates missing tables, so databases created
+by an older version are missing newer columns and indexes. This adds them.
+Safe to run on every startup, also from several workers at once: a column or
+index another worker added first is not an error.
+
+Derived data for old rows (`backfill_status`) is filled in afterwards, in small
+chunks on a background thread, so a large table doesn't hold up startup.
+"""
+import logging
+import time
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.db.models import VerificationRecord
+from app.services.auditor import overall_status
+
+logger = logging.getLogger(__name__)
+
+_BACKFILL_CHUNK = 500
+_BACKFILL_PAUSE = 0.05   # Seconds between chunks, so live writes get the table in between
+
+def backfill_status(engine):
+    """Sets `status` on rows written before the column existed. Returns the rows updated."""
+    table = VerificationRecord.__table__
+    updated = 0
+    with Session(engine) as db:
+        while True:
+            rows = db.query(VerificationRecord.id, VerificationRecord.audit_report) \
+                .filter(VerificationRecord.status.is_(None)) \
+                .limit(_BACKFILL_CHUNK).all()
+            if not rows:
+                break
+            # Another worker may be on the same rows; both write the same value
+            db.execute(
+                table.update().where(table.c.id == bindparam("row_id")).values(status=bindparam("row_status")),
+                [{"row_id": row.id, "row_status": overall_status(row.audit_report)} for row in rows]
+            )
+            db.commit()
+            updated += len(rows)
+            time.sleep(_BACKFILL_PAUSE)
+    if updated:
+        logger.info(f"Schema upgrade: backfilled status on {updated} records.")
+    return updated
+
+def _add_column(engine, table, column):
+    col_type = column.type.compile(dialect=engine.dialect)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+        return True
+    except DBAPIError:
+        # "duplicate column": another worker starting up added it first
+        if column.name in {col["name"] for col in inspect(engine).get_columns(table.name)}:
+            return False
+        raise
+
+def _add_index(engine, table, index):
+    try:
+        index.create(bind=engine, checkfirst=True)
+    except DBAPIError:
+        # Same race as the columns
+        if index.name not in {ix["name"] for ix in inspect(engine).get_indexes(table.name)}:
+            raise
+
+def upgrade_schema(engine):
+    inspector = inspect(engine)
+    table = VerificationRecord.__table__
+    if not inspector.has_table(table.name):
+        return
+
+    # 1. Missing columns
+    existing = {col["name"] for col in inspector.get_columns(table.name)}
+    added = [column.name for column in table.columns
+             if column.name not in existing and _add_column(engine, table, column)]
+
+    # 2. Missing indexes
+    for index in table.indexes:
+        _add_index(engine, table, index)
+
+    if added:
+        logger.info(f"Schema upgrade: added {added}.")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime
+from sqlalchemy import Column, Integer, String, JSON, Date, DateTime, Index
 from datetime import datetime
 from app.db.session import Base
 
@@ -7,6 +7,7 @@ class VerificationRecord(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    status = Column(String)   # Overall result: MATCH | PARTIAL | MISMATCH | ERROR
     
     # User Input
     name_input = Column(String, index=True)
@@ -19,4 +20,22 @@ class VerificationRecord(Base):
     ocr_data = Column(JSON)      # Raw text extracted
     
     # File Metadata (Good for debugging)
-    filename = Column(String, nullable=True)
\ No newline at end of file
+    filename = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination for /history: newest first, id breaks timestamp ties.
+        # Leading columns also serve plain timestamp / status lookups.
+        Index("ix_verification_history_timestamp_id", "timestamp", "id"),
+        Index("ix_verification_history_status_timestamp_id", "status", "timestamp", "id"),
+    )
+
+class ErrorRollup(Base):
+    """
+    Daily error-taxonomy counts, kept up to date on every record write.
+    error_type "TOTAL" counts the verifications themselves (denominator for rates).
+    """
+    __tablename__ = "error_rollups"
+
+    bucket = Column(Date, primary_key=True)        # UTC day
+    error_type = Column(String, primary_key=True)
+    occurrences = Column(Integer, nullable=False, default=0)
@@ -1,6 +1,36 @@
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from app.db.models import VerificationRecord
-import json
+from datetime import datetime
+from app.db.models import ErrorRollup, VerificationRecord
+from app.db.rollups import apply_rollups, rollup_deltas
+from app.db.writer import record_sink
+from app.services.auditor import overall_status
+
+# List view columns: everything except the large JSON blobs
+HISTORY_COLUMNS = (
+    VerificationRecord.id,
+    VerificationRecord.timestamp,
+    VerificationRecord.status,
+    VerificationRecord.name_input,
+    VerificationRecord.id_input,
+    VerificationRecord.dob_input,
+    VerificationRecord.filename,
+)
+
+def _record_values(name, id_number, dob, audit_report, taxonomy, ocr_data, filename):
+    # JSON serialization happens automatically by SQLAlchemy for JSON columns,
+    # but depending on the driver, ensuring dicts are passed is safer.
+    return {
+        "timestamp": datetime.utcnow(),
+        "status": overall_status(audit_report),
+        "name_input": name,
+        "id_input": id_number,
+        "dob_input": dob,
+        "audit_report": audit_report,
+        "taxonomy": taxonomy,
+        "ocr_data": ocr_data,
+        "filename": filename
+    }
 
 def create_verification_record(
     db: Session,
@@ -12,26 +42,63 @@ def create_verification_record(
     ocr_data: list,
     filename: str = None
 ):
-    """Saves a new verification attempt."""
-    
-    # JSON serialization happens automatically by SQLAlchemy for JSON columns,
-    # but depending on the driver, ensuring dicts are passed is safer.
+    """Saves a new verification attempt (synchronously, returns the row with its id)."""
     
     db_record = VerificationRecord(
-        name_input=name,
-        id_input=id_number,
-        dob_input=dob,
-        audit_report=audit_report,
-        taxonomy=taxonomy,
-        ocr_data=ocr_data,
-        filename=filename
+        **_record_values(name, id_number, dob, audit_report, taxonomy, ocr_data, filename)
     )
     
     db.add(db_record)
+    apply_rollups(db, rollup_deltas([(db_record.timestamp, db_record.taxonomy)]))
     db.commit()
     db.refresh(db_record)
     return db_record
 
+def enqueue_verification_record(
+    name: str,
+    id_number: str,
+    dob: str,
+    audit_report: dict,
+    taxonomy: dict,
+    ocr_data: list,
+    filename: str = None
+):
+    """Queues a verification attempt for the write-behind sink. Returns False if dropped."""
+    return record_sink.enqueue(
+        _record_values(name, id_number, dob, audit_report, taxonomy, ocr_data, filename)
+    )
+
 def get_recent_records(db: Session, limit: int = 50):
     """Fetches history for the dashboard."""
-    return db.query(VerificationRecord).order_by(VerificationRecord.id.desc()).limit(limit).all()
\ No newline at end of file
+    return db.query(VerificationRecord).order_by(VerificationRecord.id.desc()).limit(limit).all()
+
+def get_history_page(db: Session, limit: int = 50, after=None, status=None, date_from=None, date_to=None):
+    """
+    One page of history, newest first, without the JSON blobs.
+    Keyset pagination: `after` is the (timestamp, id) of the last row of the
+    previous page, so every page is an index range scan whatever its depth.
+    Returns (rows, has_more).
+    """
+    query = db.query(*HISTORY_COLUMNS)
+    if status:
+        query = query.filter(VerificationRecord.status == status)
+    if date_from is not None:
+        query = query.filter(VerificationRecord.timestamp >= date_from)
+    if date_to is not None:
+        query = query.filter(VerificationRecord.timestamp < date_to)
+    if after is not None:
+        query = query.filter(tuple_(VerificationRecord.timestamp, VerificationRecord.id) < tuple_(*after))
+
+    rows = query.order_by(VerificationRecord.timestamp.desc(), VerificationRecord.id.desc()) \
+        .limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+def get_record(db: Session, record_id: int):
+    """Full record (with JSON blobs) for the detail view."""
+    return db.get(VerificationRecord, record_id)
+
+def get_error_rollups(db: Session, date_from, date_to):
+    """Rollup rows for days in [date_from, date_to], oldest first."""
+    return db.query(ErrorRollup.bucket, ErrorRollup.error_type, ErrorRollup.occurrences) \
+        .filter(ErrorRollup.bucket >= date_from, ErrorRollup.bucket <= date_to) \
+        .order_by(ErrorRollup.bucket, ErrorRollup.error_type).all()
@@ -0,0 +1,56 @@
+"""
+Incremental error-taxonomy rollups.
+Every record write adds its taxonomy counts to (day, error_type) rows in
+`error_rollups` within the same transaction, so /stats never has to parse
+the per-record JSON.
+"""
+from collections import Counter
+from sqlalchemy.dialects import postgresql, sqlite
+from app.db.models import ErrorRollup
+
+TOTAL = "TOTAL"
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def rollup_deltas(records):
+    """(timestamp, taxonomy) pairs -> Counter of (bucket, error_type) increments."""
+    deltas = Counter()
+    for timestamp, taxonomy in records:
+        if timestamp is None:
+            continue
+        bucket = timestamp.date()
+        deltas[(bucket, TOTAL)] += 1
+        for error_type, count in (taxonomy or {}).items():
+            deltas[(bucket, error_type)] += int(count)
+    return deltas
+
+def apply_rollups(db, deltas):
+    """Adds `deltas` to the rollup table (caller commits)."""
+    if not deltas:
+        return
+    table = ErrorRollup.__table__
+    # Sorted so concurrent writers lock rows in the same order
+    rows = [
+        {"bucket": bucket, "error_type": error_type, "occurrences": count}
+        for (bucket, error_type), count in sorted(deltas.items())
+    ]
+
+    insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket", "error_type"],
+            set_={"occurrences": table.c.occurrences + stmt.excluded.occurrences}
+        )
+        db.execute(stmt, rows)
+        return
+
+    # Other databases: update, insert when the row doesn't exist yet
+    for row in rows:
+        result = db.execute(
+            table.update()
+            .where(table.c.bucket == row["bucket"], table.c.error_type == row["error_type"])
+            .values(occurrences=table.c.occurrences + row["occurrences"])
+        )
+        if result.rowcount == 0:
+            db.execute(table.insert().values(**row))
@@ -0,0 +1,131 @@
+import logging
+import queue
+import threading
+import time
+from app.core.config import settings
+from app.db.models import VerificationRecord
+from app.db.rollups import apply_rollups, rollup_deltas
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindSink:
+    """
+    Write-behind persistence for verification records.
+    Requests only enqueue a row; a background thread bulk-inserts the queue
+    when `batch_size` rows are waiting or `flush_interval` seconds have passed.
+    A full queue drops the row (counted) instead of slowing the request down.
+    """
+
+    def __init__(self, session_factory, batch_size, flush_interval, max_queue):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, row):
+        self.start()
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+                dropped = self._dropped
+            if dropped == 1 or dropped % 100 == 0:
+                logger.warning(f"DB write-behind queue full, {dropped} verification records dropped so far.")
+            return False
+
+    def _drain(self, limit):
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self):
+        while not self._stop.is_set():
+            # 1. Wait for the first row, then give the batch until the deadline to fill up
+            try:
+                rows = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # 2. One bulk insert (plus rollup upserts) per batch
+            self._write(rows)
+
+        # Shutting down: flush whatever is left
+        self.flush()
+
+    def _write(self, rows):
+        if not rows:
+            return
+        db = self.session_factory()
+        try:
+            db.bulk_insert_mappings(VerificationRecord, rows)
+            apply_rollups(db, rollup_deltas((row["timestamp"], row["taxonomy"]) for row in rows))
+            db.commit()
+            with self._lock:
+                self._written += len(rows)
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._failed += len(rows)
+            logger.error(f"DB write-behind flush failed ({len(rows)} records lost): {e}")
+        finally:
+            db.close()
+
+    def flush(self):
+        """Writes everything queued so far (in batches)."""
+        while True:
+            rows = self._drain(self.batch_size)
+            if not rows:
+                return
+            self._write(rows)
+
+    def stop(self, timeout=10.0):
+        """Stops the writer thread after a final flush. Returns the final stats."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        return self.stats()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+record_sink = WriteBehindSink(
+    session_factory=SessionLocal,
+    batch_size=settings.DB_WRITE_BATCH_SIZE,
+    flush_interval=settings.DB_WRITE_FLUSH_SECONDS,
+    max_queue=settings.DB_WRITE_QUEUE_SIZE
+)
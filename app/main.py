@@ -1,23 +1,83 @@
-from fastapi import FastAPI
+# CPU budget first: the OpenMP/BLAS pools are sized when numpy/cv2/torch/paddle load
+from app.core import topology
+topology.apply_thread_env()
+
+import logging
+import threading
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.ml.model_loader import preload_models
+from app.ml.model_loader import preload_models, preload_status, models_ready, models_loaded, warmup_models
+from app.ml.ocr.executor import shutdown_executors
 from .core.config import settings
+from app.core.log import configure_logging
+from app.core.metrics import HTTP_REQUEST_SECONDS, render, start_trace, end_trace
 from app.db.session import engine, Base
-from app.api.v1.endpoints import verify
+from app.db.migrations import backfill_status, upgrade_schema
+from app.api.v1.endpoints import verify, history, stats
+from app.services.admission import inference_gate
+from app.services.cache import result_cache
+from app.services.debug_artifacts import debug_writer
+from app.db.writer import record_sink
+from app.services.health import check_database, readiness
+from app.core.prefork import memory_usage
+
+configure_logging()
+topology.configure()
+logger = logging.getLogger("app.main")
+
+# Probes and scrapes: timed, but not worth a log line each
+QUIET_ROUTES = {"/metrics", "/health", "/health/live", "/health/ready"}
 
+def _preload_in_background(step=preload_models):
+    try:
+        step()
+    except Exception as e:
+        # Already recorded in the preload status; readiness stays red
+        logger.error(f"Model preload failed: {e}")
+
+def _backfill_in_background():
+    try:
+        backfill_status(engine)
+    except Exception:
+        # Rows left without a status are picked up on the next start
+        logger.exception("Status backfill failed")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 1. Create Tables (If not exist)
+    # 1. Create Tables (If not exist), then add columns/indexes older databases lack
     Base.metadata.create_all(bind=engine)
-    print("Database tables created.")
+    upgrade_schema(engine)
+    logger.info("Database tables created.")
+    threading.Thread(target=_backfill_in_background, name="status-backfill", daemon=True).start()
     
-    # 2. Load Models
-    preload_models()
+    # 2. Load Models in the background (unless a separate model server does the inference).
+    #    The server is live right away; /health/ready turns green once they are warm.
+    if settings.MODEL_SERVER_ENABLED:
+        logger.info(f"Using model server at {settings.MODEL_SERVER_ADDRESS}")
+    elif models_loaded():
+        # Pre-fork mode: loaded by the gunicorn master, shared copy-on-write. The warm-up
+        # runs here, after the fork, so the inference thread pools start in this worker.
+        logger.info("Using models loaded before fork", extra={"memory": memory_usage()})
+        if not models_ready():
+            threading.Thread(target=_preload_in_background, args=(warmup_models,), name="model-warmup", daemon=True).start()
+    else:
+        threading.Thread(target=_preload_in_background, name="model-preload", daemon=True).start()
+
+    # 3. Background DB writer
+    if settings.DB_WRITE_MODE == "write_behind":
+        record_sink.start()
     yield
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    shutdown_executors()
+    if settings.DB_WRITE_MODE == "write_behind":
+        writer_stats = record_sink.stop()
+        logger.info(f"DB write-behind flushed: {writer_stats['written']} written, "
+                    f"{writer_stats['dropped']} dropped, {writer_stats['failed']} failed.")
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -33,16 +93,98 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _record_request(request, trace, started, status):
+    elapsed = time.perf_counter() - started
+    # Route template (/history/{record_id}), not the raw path, keeps the label set small
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    if request.url.path.startswith(settings.API_V1_STR) and not route.startswith(settings.API_V1_STR):
+        route = settings.API_V1_STR + route   # Included routers report their path without the prefix
+    HTTP_REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=status)
+    if route not in QUIET_ROUTES:
+        # Annotations first, so they can never replace the request's own keys
+        logger.info("request", extra={
+            **trace.fields,
+            "method": request.method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 2),
+            "stages": trace.stages
+        })
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Request id + latency histogram + one structured log line (with stage timings) per request.
+    Recorded once the body has been sent, so streamed responses (/verify/batch) are timed in full.
+    """
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    trace, token = start_trace(request_id)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _record_request(request, trace, started, 500)
+        raise
+    finally:
+        end_trace(token)
+    response.headers["X-Request-ID"] = request_id
+
+    body = response.body_iterator
+    async def timed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            # Also runs when the client goes away mid-stream
+            _record_request(request, trace, started, response.status_code)
+    response.body_iterator = timed_body()
+    return response
 
 # Register Router
 app.include_router(verify.router, prefix=settings.API_V1_STR, tags=["Verification"])
+app.include_router(history.router, prefix=settings.API_V1_STR, tags=["History"])
+app.include_router(stats.router, prefix=settings.API_V1_STR, tags=["Stats"])
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (this process only)."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+def liveness():
+    """Process is up and serving (models may still be loading). 503 only if the preload failed."""
+    if not settings.MODEL_SERVER_ENABLED and preload_status()["status"] == "failed":
+        return JSONResponse(status_code=503, content={"status": "preload_failed"})
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness_check():
+    """200 once all models are warm and the database answers, 503 before that."""
+    result = readiness()
+    return JSONResponse(status_code=200 if result["ready"] else 503, content=result)
+
+def _batcher_stats():
+    # Only where YOLO runs in this process (imports torch)
+    if not settings.YOLO_MICROBATCH_ENABLED or settings.MODEL_SERVER_ENABLED:
+        return None
+    from app.ml.detection.yolo import get_batcher
+    return get_batcher().stats()
 
 @app.get("/health")
 def health_check():
+    database = check_database()
     return {
         "status": "active",
         "mode": settings.MODE,
-        "database": "connected"
+        "database": "connected" if database["ok"] else f"error: {database['error']}",
+        "models": "model_server" if settings.MODEL_SERVER_ENABLED else preload_status()["status"],
+        "queue": inference_gate.stats(),
+        "yolo_batching": _batcher_stats(),
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "debug_artifacts": debug_writer.stats(),
+        "db_writer": record_sink.stats() if settings.DB_WRITE_MODE == "write_behind" else None,
+        "prefork": settings.PREFORK_MODELS,
+        "memory": memory_usage()
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+Detector backends.
+
+"torch" runs YOLO_MODEL_PATH through ultralytics as before. "onnx" (ONNX Runtime)
+and "openvino" run a graph exported from that same .pt. The exported graph is
+loaded through ultralytics too, so pre/post-processing (letterbox, NMS, class
+names) and therefore detect_regions / process_cards behave the same on every backend.
+
+Exports are cached in YOLO_EXPORT_DIR under a name derived from the .pt contents,
+so a new model file triggers a new export and old ones are never reused by mistake.
+
+    python -m app.ml.detection.backends onnx      # pre-export (e.g. in the Docker build)
+
+"onnx_int8" runs the INT8 graph from app/ml/quantize.py (same cache, "-int8" suffix).
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import sys
+from functools import lru_cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# backend -> (ultralytics export format, suffix of the exported artifact)
+EXPORT_FORMATS = {
+    "onnx": ("onnx", ".onnx"),
+    "openvino": ("openvino", "_openvino_model"),
+}
+BACKENDS = ("torch",) + tuple(EXPORT_FORMATS) + ("onnx_int8",)
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+@lru_cache(maxsize=None)
+def _checkpoint_imgsz(source):
+    """The train_args imgsz stored in the .pt, read without building a model."""
+    from ultralytics.nn.tasks import torch_safe_load
+    ckpt, _ = torch_safe_load(source)
+    return (ckpt.get("train_args") or {}).get("imgsz") or 640   # 640 = ultralytics' own default
+
+def default_imgsz(source=None):
+    """
+    YOLO_IMGSZ, or else the size the .pt was trained at: what ultralytics uses
+    when predict() gets no imgsz. With the torch backend it comes from the model
+    already loaded; exported graphs don't carry it, so then it is read from the .pt.
+    """
+    if settings.YOLO_IMGSZ:
+        return settings.YOLO_IMGSZ
+    source = source or settings.YOLO_MODEL_PATH
+    if settings.YOLO_BACKEND == "torch" and source == settings.YOLO_MODEL_PATH:
+        from app.ml.detection.yolo import get_model   # yolo imports this module
+        return get_model().overrides.get("imgsz") or 640
+    return _checkpoint_imgsz(source)
+
+def export_path(backend, source=None, imgsz=None):
+    """Where the exported model for `backend` lives (whether or not it exists yet)."""
+    source = source or settings.YOLO_MODEL_PATH
+    imgsz = imgsz or default_imgsz(source)
+    size = imgsz if isinstance(imgsz, int) else "x".join(map(str, imgsz))
+    stem = os.path.splitext(os.path.basename(source))[0]
+    suffix = EXPORT_FORMATS[backend][1]
+    return os.path.join(settings.YOLO_EXPORT_DIR, f"{stem}-{_file_digest(source)}-{size}{suffix}")
+
+def int8_path(source=None, imgsz=None):
+    """Where `python -m app.ml.quantize yolo` writes the INT8 graph for the current .pt."""
+    return export_path("onnx", source, imgsz)[:-len(".onnx")] + "-int8.onnx"
+
+def export_model(backend, source=None, imgsz=None, force=False):
+    """
+    Exports `source` (.pt) for `backend` into the cache and returns its path.
+    A file lock keeps concurrent workers from exporting the same model twice.
+    """
+    from ultralytics import YOLO
+
+    source = source or settings.YOLO_MODEL_PATH
+    imgsz = imgsz or default_imgsz(source)
+    target = export_path(backend, source, imgsz)
+    os.makedirs(settings.YOLO_EXPORT_DIR, exist_ok=True)
+
+    with open(target + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(target) and not force:
+            return target
+
+        logger.info(f"Exporting YOLO ({backend}, imgsz={imgsz}) from {source}")
+        # dynamic=True keeps the batch axis free for the micro-batcher
+        exported = YOLO(source).export(
+            format=EXPORT_FORMATS[backend][0],
+            imgsz=imgsz,
+            dynamic=True,
+            half=False,
+            device="cpu"
+        )
+
+        # ultralytics writes next to the .pt; move it into the cache
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        elif os.path.exists(target):
+            os.remove(target)
+        shutil.move(str(exported), target)
+        logger.info(f"Exported YOLO to {target}")
+        return target
+
+def resolve_model_path(backend=None):
+    """Model path to hand to ultralytics.YOLO for the configured backend (exports on first use)."""
+    backend = backend or settings.YOLO_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown YOLO_BACKEND '{backend}', expected one of {', '.join(BACKENDS)}.")
+    if backend == "torch":
+        return settings.YOLO_MODEL_PATH
+    if backend == "onnx_int8":
+        # Needs calibration images, so it is never built implicitly
+        path = int8_path()
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No INT8 model at {path}. Run: python -m app.ml.quantize yolo --calib <card images>"
+            )
+        return path
+    return export_model(backend)
+
+if __name__ == "__main__":
+    backend = sys.argv[1] if len(sys.argv) > 1 else settings.YOLO_BACKEND
+    if backend not in EXPORT_FORMATS:
+        sys.exit(f"usage: python -m app.ml.detection.backends {{{'|'.join(EXPORT_FORMATS)}}}")
+    print(export_model(backend, force="--force" in sys.argv))
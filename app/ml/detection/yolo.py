@@ -1,9 +1,18 @@
 import cv2
+import logging
+import queue
+import threading
+import time
 import numpy as np
+from concurrent.futures import Future
 
 from ultralytics import YOLO
 
 from app.core.config import settings
+from app.core.metrics import SMART_SPLITS
+from app.ml.detection.backends import default_imgsz, resolve_model_path
+
+logger = logging.getLogger(__name__)
 
 # Global Model Variable
 _YOLO_MODEL = None
@@ -12,8 +21,10 @@ def load_model():
     "Explicitly called during startup"
 
     global _YOLO_MODEL
-    print(f"Loading YOLO from {settings.YOLO_MODEL_PATH}...")
-    _YOLO_MODEL = YOLO(settings.YOLO_MODEL_PATH)
+    path = resolve_model_path(settings.YOLO_BACKEND)
+    logger.info(f"Loading YOLO ({settings.YOLO_BACKEND}) from {path}")
+    _YOLO_MODEL = YOLO(path, task="detect")
+    return _YOLO_MODEL
 
 
 def get_model():
@@ -23,23 +34,136 @@ def get_model():
         load_model()
     return _YOLO_MODEL
 
-def detect_regions(image: np.ndarray, conf_threshold: float = 0.3):
+class MicroBatcher:
+    """
+    Gathers images from concurrent requests for up to `max_wait_ms` or `max_batch`
+    images, runs one batched predict and hands every caller its own result.
+    Images are only batched with others of the same (threshold, imgsz).
+    """
 
-    model = get_model()
+    def __init__(self, max_batch, max_wait_ms):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "images": 0, "max_batch_seen": 0, "wait_ms_total": 0.0, "predict_ms_total": 0.0}
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="yolo-microbatch", daemon=True)
+                self._thread.start()
+
+    def submit(self, image, conf_threshold, imgsz):
+        """Queues `image`; the Future resolves to its ultralytics Result."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((image, (conf_threshold, imgsz), time.monotonic(), future))
+        return future
+
+    def predict(self, image, conf_threshold, imgsz):
+        """Blocks until the batch containing `image` has run. Returns its ultralytics Result."""
+        return self.submit(image, conf_threshold, imgsz).result()
+
+    def _run(self):
+        while True:
+            # 1. Block for the first image, then collect more until the window closes
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # 2. One predict per distinct (threshold, imgsz) (one or two with the cascade)
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for (conf_threshold, imgsz), items in groups.items():
+                self._run_group(conf_threshold, imgsz, items)
+
+    def _run_group(self, conf_threshold, imgsz, items):
+        started = time.monotonic()
+        error = None
+        try:
+            results = _predict([item[0] for item in items], conf_threshold, imgsz)
+            if len(results) != len(items):
+                raise RuntimeError(f"YOLO returned {len(results)} results for a batch of {len(items)} images.")
+            for item, result in zip(items, results):
+                item[3].set_result(result)
+        except Exception as e:
+            error = e
+        finally:
+            # Never leave a caller waiting, whatever went wrong above
+            for item in items:
+                if not item[3].done():
+                    item[3].set_exception(error or RuntimeError("YOLO batch produced no result for this image."))
+
+        finished = time.monotonic()
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["images"] += len(items)
+            self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(items))
+            self._stats["wait_ms_total"] += sum(started - item[2] for item in items) * 1000
+            self._stats["predict_ms_total"] += (finished - started) * 1000
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        batches, images = max(1, s["batches"]), max(1, s["images"])
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": s["batches"],
+            "images": s["images"],
+            "max_batch_seen": s["max_batch_seen"],
+            "avg_batch_size": round(s["images"] / batches, 2),
+            "avg_queue_wait_ms": round(s["wait_ms_total"] / images, 2),
+            "avg_predict_ms": round(s["predict_ms_total"] / batches, 2),
+            "avg_predict_ms_per_image": round(s["predict_ms_total"] / images, 2),
+        }
+
+_BATCHER = None
+_BATCHER_LOCK = threading.Lock()
+
+def get_batcher():
+    global _BATCHER
+    with _BATCHER_LOCK:
+        if _BATCHER is None:
+            _BATCHER = MicroBatcher(settings.YOLO_MAX_BATCH, settings.YOLO_MAX_WAIT_MS)
+        return _BATCHER
+
+def reset_batcher():
+    """Forgets the batcher (and its thread) inherited through a fork; a new one starts on first use."""
+    global _BATCHER, _BATCHER_LOCK
+    _BATCHER_LOCK = threading.Lock()
+    _BATCHER = None
 
+def _predict(images, conf_threshold, imgsz):
     # verbose = false prevents clusttering producction logs.
+    return get_model().predict(source=images, conf=conf_threshold, imgsz=imgsz, verbose=False)
 
-    results = model.predict(source=image, conf=conf_threshold, verbose=False)
+def _run(images, conf_threshold, imgsz):
+    """One Result per image, through the micro-batcher when it is on."""
+    if settings.YOLO_MICROBATCH_ENABLED:
+        futures = [get_batcher().submit(image, conf_threshold, imgsz) for image in images]
+        return [future.result() for future in futures]
+    return _predict(images, conf_threshold, imgsz)
 
+def _parse_result(result, image, names, offset=(0, 0)):
+    """Detections with boxes in `image` coordinates (`offset` = where the predicted crop sits in it)."""
+    ox, oy = offset
     detections = []
-
-    if not results:
-        return detections
-    
-    for box in results[0].boxes:
+    for box in result.boxes:
 
         x1, y1, x2, y2 = map(int, box.xyxy[0])
-        label = model.names[int(box.cls[0])]
+        x1, y1, x2, y2 = x1 + ox, y1 + oy, x2 + ox, y2 + oy
+        label = names[int(box.cls[0])]
         detections.append({
             "label": label,
             "conf": float(box.conf[0]),
@@ -48,6 +172,61 @@ def detect_regions(image: np.ndarray, conf_threshold: float = 0.3):
         })
     return detections
 
+def _iou(a, b):
+    ix1, iy1, ix2, iy2 = max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def _card_windows(boundaries, width, height):
+    """Padded crop windows around the boundaries, skipping near-duplicate boxes."""
+    windows = []
+    for b in sorted(boundaries, key=lambda d: -d["conf"]):
+        if any(_iou(b["bbox"], kept["bbox"]) > 0.5 for kept, _ in windows):
+            continue
+        x1, y1, x2, y2 = b["bbox"]
+        pad_x = int((x2 - x1) * settings.YOLO_CASCADE_PAD)
+        pad_y = int((y2 - y1) * settings.YOLO_CASCADE_PAD)
+        window = (max(0, x1 - pad_x), max(0, y1 - pad_y), min(width, x2 + pad_x), min(height, y2 + pad_y))
+        if window[2] - window[0] > 1 and window[3] - window[1] > 1:
+            windows.append((b, window))
+    return windows
+
+def _detect_cascade(image, conf_threshold, names):
+    # 1. Coarse pass: where are the cards?
+    coarse = _parse_result(_run([image], conf_threshold, settings.YOLO_COARSE_IMGSZ)[0], image, names)
+    boundaries = [d for d in coarse if d["label"] == "Id_card_boundary"]
+    height, width = image.shape[:2]
+    windows = _card_windows(boundaries, width, height)
+
+    # No card found at low resolution: same as the single pass
+    if not windows:
+        return _parse_result(_run([image], conf_threshold, default_imgsz())[0], image, names)
+
+    # 2. Fine pass on the card crops only, boxes mapped back to the full image
+    crops = [np.ascontiguousarray(image[y1:y2, x1:x2]) for _, (x1, y1, x2, y2) in windows]
+    results = _run(crops, conf_threshold, settings.YOLO_FINE_IMGSZ or default_imgsz())
+
+    detections = [boundary for boundary, _ in windows]
+    for (_, (x1, y1, _, _)), result in zip(windows, results):
+        for d in _parse_result(result, image, names, offset=(x1, y1)):
+            # The coarse pass already gave the card boundary
+            if d["label"] != "Id_card_boundary":
+                detections.append(d)
+    return detections
+
+def detect_regions(image: np.ndarray, conf_threshold: float = 0.3):
+
+    model = get_model()
+
+    if settings.YOLO_CASCADE_ENABLED:
+        return _detect_cascade(image, conf_threshold, model.names)
+
+    results = _run([image], conf_threshold, default_imgsz())
+    if not results:
+        return []
+    return _parse_result(results[0], image, model.names)
+
 def process_cards(detections, img_shape):
     """
     Groups detections into logical cards.
@@ -91,7 +270,8 @@ def process_cards(detections, img_shape):
                 "label": "virtual_boundary"
             }
             boundaries = [b1, b2]
-            print("DEBUG: Smart Split Triggered (Composite Image detected)")
+            SMART_SPLITS.inc()
+            logger.debug("Smart Split Triggered (Composite Image detected)")
 
     # 2. Fallback: If no boundaries and not composite, assume whole image
     if not boundaries:
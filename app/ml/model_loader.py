@@ -1,12 +1,169 @@
-from app.ml.detection.yolo import load_model as load_yolo
-from app.ml.ocr.engines import load_engines as load_ocr
+import cv2
+import logging
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
-def preload_models():
+from app.core.config import settings
+from app.ml.detection.backends import default_imgsz
+
+logger = logging.getLogger(__name__)
+
+# Preload state, read by the readiness probe
+_STATE = {"status": "pending", "started_at": None, "total_ms": None, "models": {}}
+_STATE_LOCK = threading.Lock()
+
+def _synthetic_card():
+    """White card with a line of text, so the detectors have something to find."""
+    img = np.full((480, 760, 3), 255, dtype=np.uint8)
+    cv2.putText(img, "NEPAL 01-02-03-04567", (40, 240), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0, 0, 0), 3)
+    return img
+
+def _synthetic_line():
+    img = np.full((48, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(img, "2055-01-15", (10, 34), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return img
+
+# --- Warm-up (first inference builds the graph / allocates buffers) ---
+
+def _warmup_yolo(model):
+    sizes = [default_imgsz()]
+    if settings.YOLO_CASCADE_ENABLED:
+        sizes = sorted({settings.YOLO_COARSE_IMGSZ, settings.YOLO_FINE_IMGSZ or default_imgsz(), default_imgsz()})
+    for imgsz in sizes:
+        model.predict(_synthetic_card(), conf=0.3, imgsz=imgsz, verbose=False)
+
+def _warmup_paddle(engine):
+    engine.ocr(_synthetic_card())
+
+def _warmup_recognizer(recognizer):
+    recognizer.predict(_synthetic_line())
+
+def _tasks():
+    # Imported here: the readiness state above is also read by API workers that
+    # use the model server and must not load torch / paddle
+    from app.ml.detection.yolo import get_model as get_yolo, load_model as load_yolo
+    from app.ml.ocr.engines import get_paddle_en, get_paddle_ne, get_rec_en, get_rec_ne, load_engine, load_recognizer
+
+    # (name, loader that builds a new model, getter for the loaded one, warm-up)
+    tasks = [
+        ("yolo", load_yolo, get_yolo, _warmup_yolo),
+        ("paddle_ne", lambda: load_engine('ne'), get_paddle_ne, _warmup_paddle),
+        ("paddle_en", lambda: load_engine('en'), get_paddle_en, _warmup_paddle),
+    ]
+    if settings.OCR_MODE == "rec_only":
+        tasks += [
+            ("rec_ne", lambda: load_recognizer('ne'), get_rec_ne, _warmup_recognizer),
+            ("rec_en", lambda: load_recognizer('en'), get_rec_en, _warmup_recognizer),
+        ]
+    return tasks
+
+def _set_model(name, **fields):
+    with _STATE_LOCK:
+        _STATE["models"].setdefault(name, {}).update(fields)
+
+def _warm_one(name, model, warmup):
+    _set_model(name, status="warming")
+    t0 = time.perf_counter()
+    warmup(model)
+    warmup_ms = round((time.perf_counter() - t0) * 1000)
+    _set_model(name, status="ready", warmup_ms=warmup_ms)
+    return warmup_ms
+
+def _load_one(name, load, get, warmup, warm=True):
+    _set_model(name, status="loading")
+    t0 = time.perf_counter()
+    model = load()
+    load_ms = round((time.perf_counter() - t0) * 1000)
+
+    warmup_ms = None
+    if warm and settings.MODEL_WARMUP:
+        warmup_ms = _warm_one(name, model, warmup)
+    else:
+        # Without MODEL_WARMUP a loaded model is ready; otherwise warmup_models() finishes it
+        _set_model(name, status="loaded" if settings.MODEL_WARMUP else "ready", warmup_ms=None)
+    _set_model(name, load_ms=load_ms)
+    logger.info(f"{name} loaded", extra={"model": name, "load_ms": load_ms, "warmup_ms": warmup_ms})
+
+def _load_cold(name, load, get, warmup):
+    _load_one(name, load, get, warmup, warm=False)
+
+def _warm_loaded(name, load, get, warmup):
+    # The getter returns the model preload_models() loaded (the master's copy after a fork)
+    warmup_ms = _warm_one(name, get(), warmup)
+    logger.info(f"{name} warm", extra={"model": name, "warmup_ms": warmup_ms})
+
+def _run_task(step, task):
+    name = task[0]
+    try:
+        step(*task)
+        return None
+    except Exception as e:
+        _set_model(name, status="failed", error=str(e))
+        logger.exception(f"{name}: preload failed", extra={"model": name})
+        return e
+
+def _run_all(step):
+    """Runs one step for every model; returns the errors and the elapsed ms."""
+    tasks = _tasks()
+    t0 = time.perf_counter()
+    if settings.MODEL_PRELOAD_PARALLEL:
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="preload") as pool:
+            errors = list(pool.map(lambda task: _run_task(step, task), tasks))
+    else:
+        errors = [_run_task(step, task) for task in tasks]
+    return [e for e in errors if e is not None], round((time.perf_counter() - t0) * 1000)
+
+def preload_models(warmup=True):
     """
     Call this on app startup.
-    This ensures models are in RAM before the first request hits.
+    This ensures models are in RAM (and warmed up) before the first request hits.
+    `warmup=False` only loads them (status "loaded"); warmup_models() finishes the job.
+    Raises the first error if any model failed to load.
+    """
+    logger.info("Starting model preload")
+    with _STATE_LOCK:
+        _STATE.update(status="loading", started_at=time.time(), total_ms=None, models={})
+
+    errors, total_ms = _run_all(_load_one if warmup else _load_cold)
+
+    with _STATE_LOCK:
+        if errors:
+            _STATE["status"] = "failed"
+        elif warmup or not settings.MODEL_WARMUP:
+            _STATE["status"] = "ready"
+        else:
+            _STATE["status"] = "loaded"
+        _STATE["total_ms"] = total_ms
+    if errors:
+        raise errors[0]
+    logger.info("Model preload complete", extra={"total_ms": total_ms, "status": _STATE["status"]})
+
+def warmup_models():
+    """
+    Warms models loaded with preload_models(warmup=False). Pre-fork workers call this
+    after the fork, so the inference thread pools (OpenMP, BLAS) start in the worker.
     """
-    print("--- STARTING MODEL PRELOAD ---")
-    load_yolo()
-    load_ocr()
-    print("--- MODEL PRELOAD COMPLETE ---")
\ No newline at end of file
+    with _STATE_LOCK:
+        _STATE["status"] = "warming"
+
+    errors, warmup_ms = _run_all(_warm_loaded)
+
+    with _STATE_LOCK:
+        _STATE["status"] = "failed" if errors else "ready"
+        _STATE["total_ms"] = (_STATE["total_ms"] or 0) + warmup_ms
+    if errors:
+        raise errors[0]
+    logger.info("Model warm-up complete", extra={"warmup_ms": warmup_ms})
+
+def models_loaded():
+    """Loaded in this process (possibly not warm yet)."""
+    return _STATE["status"] in ("loaded", "ready")
+
+def models_ready():
+    return _STATE["status"] == "ready"
+
+def preload_status():
+    with _STATE_LOCK:
+        return {**_STATE, "models": {k: dict(v) for k, v in _STATE["models"].items()}}
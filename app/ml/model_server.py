@@ -0,0 +1,188 @@
+"""
+Out-of-process model server.
+
+Loads YOLO + PaddleOCR once in a small pool of inference processes, so HTTP
+workers no longer carry their own copy of every model.
+
+    python -m app.ml.model_server          # start the server
+    MODEL_SERVER_ENABLED=True gunicorn ... # API workers send images to it
+
+API workers connect over a local Unix socket (MODEL_SERVER_ADDRESS). Decoded
+images are copied into multiprocessing.shared_memory and only a small
+(name, shape, dtype) descriptor crosses the socket. No external broker needed.
+
+The manager channel unpickles what it receives, so whoever can connect can run
+code in the inference processes. Hence:
+  * MODEL_SERVER_AUTHKEY must be set (a random string of 16+ characters, the
+    same for server and API workers); there is no default.
+  * The socket's directory must belong to the service user and be private
+    (0700); the server creates it that way and chmods the socket to 0600.
+    A shared directory such as /tmp itself is refused.
+"""
+import gc
+import logging
+import os
+import stat
+import threading
+import numpy as np
+from multiprocessing import get_context, resource_tracker, shared_memory
+from multiprocessing.managers import BaseManager
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class _ModelServerManager(BaseManager):
+    pass
+
+_ModelServerManager.register("get_service")
+
+# --- Channel Security ---
+
+def _authkey():
+    key = settings.MODEL_SERVER_AUTHKEY
+    if not key or key == "change-me" or len(key) < 16:
+        raise RuntimeError("MODEL_SERVER_AUTHKEY must be set to a private random string of at least 16 characters.")
+    return key.encode()
+
+def _private_socket_dir(address, create=False):
+    """The socket's directory, checked to be ours and closed to everyone else."""
+    directory = os.path.dirname(os.path.abspath(address))
+    if create:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise RuntimeError(
+            f"Model server socket directory {directory} must be owned by this user with mode 0700 "
+            f"(found uid {info.st_uid}, mode {oct(stat.S_IMODE(info.st_mode))})."
+        )
+    return directory
+
+# --- Shared Memory Helpers ---
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # The API worker created (and will unlink) this block. Stop our resource
+    # tracker from "cleaning it up" when this process exits.
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+def _close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # A numpy view is still alive somewhere; collect and retry once
+        gc.collect()
+        shm.close()
+
+# --- Inference Process Side ---
+
+def _init_worker():
+    from app.core import topology
+    from app.core.log import configure_logging
+    from app.ml.model_loader import preload_models
+    configure_logging()
+    # Each inference process gets its share of the cores (OMP/BLAS env set by serve())
+    topology.set_process_count(settings.MODEL_SERVER_WORKERS)
+    topology.configure(inference=True)
+    preload_models()
+
+def _infer(shm_name, shape, dtype, capture_debug=False, user_entry=None):
+    from app.services.verifier import extract_ocr_results
+
+    shm = _attach(shm_name)
+    try:
+        image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        results = extract_ocr_results(image, capture_debug, user_entry)
+        del image
+        return results
+    finally:
+        _close(shm)
+
+class InferenceService:
+    """Object exposed over the manager socket. Dispatches work to the process pool."""
+
+    def __init__(self, pool, workers):
+        self._pool = pool
+        self._workers = workers
+
+    def infer(self, shm_name, shape, dtype, capture_debug=False, user_entry=None):
+        return self._pool.apply(_infer, (shm_name, shape, dtype, capture_debug, user_entry))
+
+    def ping(self):
+        return {"pid": os.getpid(), "workers": self._workers}
+
+def serve():
+    from app.core import topology
+    from app.core.log import configure_logging
+    configure_logging()
+    address = settings.MODEL_SERVER_ADDRESS
+    workers = max(1, settings.MODEL_SERVER_WORKERS)
+    # The spawned inference processes inherit the environment: size their OpenMP/BLAS
+    # pools before they import numpy / torch / paddle
+    topology.set_process_count(workers)
+    topology.apply_thread_env()
+    authkey = _authkey()
+    _private_socket_dir(address, create=True)
+
+    # Remove a stale socket left behind by a crashed server
+    if os.path.exists(address):
+        os.remove(address)
+
+    logger.info(f"Starting model server ({workers} workers)")
+    pool = get_context("spawn").Pool(processes=workers, initializer=_init_worker)
+    service = InferenceService(pool, workers)
+
+    _ModelServerManager.register("get_service", callable=lambda: service)
+    manager = _ModelServerManager(address=address, authkey=authkey)
+    server = manager.get_server()
+    os.chmod(address, 0o600)
+    logger.info(f"Model server listening on {address}")
+
+    try:
+        server.serve_forever()
+    finally:
+        pool.terminate()
+        if os.path.exists(address):
+            os.remove(address)
+
+# --- API Worker Side ---
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+def get_service(reconnect=False):
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None or reconnect:
+            # Only talk to a server whose socket nobody else could have planted
+            _private_socket_dir(settings.MODEL_SERVER_ADDRESS)
+            manager = _ModelServerManager(
+                address=settings.MODEL_SERVER_ADDRESS,
+                authkey=_authkey()
+            )
+            manager.connect()
+            _SERVICE = manager.get_service()
+        return _SERVICE
+
+def extract_ocr_results_remote(image, capture_debug=False, user_entry=None):
+    """Same contract as verifier.extract_ocr_results, executed on the model server."""
+    image = np.ascontiguousarray(image)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+    try:
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)
+        view[:] = image
+        del view
+
+        args = (shm.name, image.shape, image.dtype.str, capture_debug, user_entry)
+        try:
+            return get_service().infer(*args)
+        except (ConnectionError, EOFError):
+            # Server restarted since we connected; reconnect once
+            return get_service(reconnect=True).infer(*args)
+    finally:
+        shm.close()
+        shm.unlink()
+
+if __name__ == "__main__":
+    serve()
@@ -1,16 +1,25 @@
-from paddleocr import PaddleOCR
+import logging
+import threading
+from paddleocr import PaddleOCR, TextRecognition
 from app.core.config import settings
+from app.core.topology import ocr_threads
+
+logger = logging.getLogger(__name__)
 
 # Global instances
 _PADDLE_NE = None
 _PADDLE_EN = None
-def load_engines():
-    """Loads all OCR engines into memory."""
-    global _PADDLE_NE, _PADDLE_EN, _DOCTR
+_REC_NE = None
+_REC_EN = None
+
+# Per-thread instances for extra executor workers (see app.ml.ocr.executor)
+_WORKER = threading.local()
+_WORKER_SLOTS = {}
+_SLOT_LOCK = threading.Lock()
 
-    print("Loading Paddle (NE)...")
-    _PADDLE_NE = PaddleOCR(
-        lang='ne', 
+def _build_paddle(lang):
+    return PaddleOCR(
+        lang=lang, 
         # Explicitly disable dangerous features for CPU
         use_doc_orientation_classify=False,
         use_doc_unwarping=False,
@@ -18,25 +27,110 @@ def load_engines():
         # use_angle_cls=False,          # <--- REMOVED (Conflicting Argument)
         enable_mkldnn=False,            # <--- Disable MKLDNN to prevent crashes
         # use_gpu=False,                  # <--- Ensure CPU mode
-        rec_batch_num=1   
-    )
-    
-    print("Loading Paddle (EN)...")
-    _PADDLE_EN = PaddleOCR(
-        lang='en', 
-        use_doc_orientation_classify=False,
-        use_doc_unwarping=False,
-        use_textline_orientation=False, # We keep this one
-        # use_angle_cls=False,          # <--- REMOVED (Conflicting Argument)
-        enable_mkldnn=False,
-        # use_gpu=False,
-        rec_batch_num=1
+        rec_batch_num=settings.OCR_REC_BATCH_NUM,
+        cpu_threads=ocr_threads(),      # This worker's core budget, split over the engines
+        # Optional local recognition model (e.g. INT8), None = official download
+        **_rec_model_overrides(lang)
     )
 
+def _rec_model_overrides(lang):
+    model_dir = _rec_model_dir(lang)
+    if not model_dir:
+        return {}
+    model_name = settings.OCR_REC_MODEL_NE if lang == 'ne' else settings.OCR_REC_MODEL_EN
+    return {"text_recognition_model_name": model_name, "text_recognition_model_dir": model_dir}
+
+def _rec_model_dir(lang):
+    return settings.OCR_REC_MODEL_DIR_NE if lang == 'ne' else settings.OCR_REC_MODEL_DIR_EN
+
+def _build_recognizer(model_name, model_dir=None):
+    return TextRecognition(model_name=model_name, model_dir=model_dir, enable_mkldnn=False, cpu_threads=ocr_threads())
+
+def load_engine(lang):
+    """Loads one full OCR engine ('ne' or 'en')."""
+    global _PADDLE_NE, _PADDLE_EN
+
+    logger.info(f"Loading Paddle ({lang.upper()})")
+    engine = _build_paddle(lang)
+    if lang == 'ne':
+        _PADDLE_NE = engine
+    else:
+        _PADDLE_EN = engine
+    return engine
+
+def load_recognizer(lang):
+    """Loads one recognition-only model ('ne' or 'en'), used when OCR_MODE is 'rec_only'."""
+    global _REC_NE, _REC_EN
+
+    model_name = settings.OCR_REC_MODEL_NE if lang == 'ne' else settings.OCR_REC_MODEL_EN
+    model_dir = _rec_model_dir(lang)
+    logger.info(f"Loading Paddle Rec ({lang.upper()}): {model_dir or model_name}")
+    recognizer = _build_recognizer(model_name, model_dir)
+    if lang == 'ne':
+        _REC_NE = recognizer
+    else:
+        _REC_EN = recognizer
+    return recognizer
+
+def load_engines():
+    """Loads all OCR engines into memory."""
+    load_engine('ne')
+    load_engine('en')
+
+    if settings.OCR_MODE == "rec_only":
+        load_recognizers()
+
+def load_recognizers():
+    """Loads the recognition-only models used when OCR_MODE is 'rec_only'."""
+    load_recognizer('ne')
+    load_recognizer('en')
+
+def bind_worker(script):
+    """
+    Thread initializer for the OCR executors.
+    The first worker of each script uses the global engines. Extra workers get
+    their own copies, because Paddle predictors must not be shared between threads.
+    """
+    with _SLOT_LOCK:
+        slot = _WORKER_SLOTS.get(script, 0)
+        _WORKER_SLOTS[script] = slot + 1
+    _WORKER.slot = slot
+    _WORKER.instances = {}
+
+def reset_worker_slots():
+    """Called when the executors are torn down, so new workers start from slot 0."""
+    with _SLOT_LOCK:
+        _WORKER_SLOTS.clear()
+
+def _worker_instance(kind, build, *args):
+    if getattr(_WORKER, "slot", 0) == 0:
+        return None
+    instance = _WORKER.instances.get(kind)
+    if instance is None:
+        logger.info(f"Loading {kind} for executor worker {_WORKER.slot}")
+        instance = _WORKER.instances[kind] = build(*args)
+    return instance
+
 def get_paddle_ne():
+    instance = _worker_instance("paddle_ne", _build_paddle, 'ne')
+    if instance is not None: return instance
     if _PADDLE_NE is None: load_engines()
     return _PADDLE_NE
 
 def get_paddle_en():
+    instance = _worker_instance("paddle_en", _build_paddle, 'en')
+    if instance is not None: return instance
     if _PADDLE_EN is None: load_engines()
     return _PADDLE_EN
+
+def get_rec_ne():
+    instance = _worker_instance("rec_ne", _build_recognizer, settings.OCR_REC_MODEL_NE, settings.OCR_REC_MODEL_DIR_NE)
+    if instance is not None: return instance
+    if _REC_NE is None: load_recognizers()
+    return _REC_NE
+
+def get_rec_en():
+    instance = _worker_instance("rec_en", _build_recognizer, settings.OCR_REC_MODEL_EN, settings.OCR_REC_MODEL_DIR_EN)
+    if instance is not None: return instance
+    if _REC_EN is None: load_recognizers()
+    return _REC_EN
@@ -0,0 +1,42 @@
+"""
+Bounded inference executors.
+One thread pool per OCR engine (sized by OCR_WORKERS_NE / OCR_WORKERS_EN), so the
+Nepali (front) and English (back) models run side by side while each engine's
+concurrency stays capped.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+
+_EXECUTORS = {}
+_LOCK = threading.Lock()
+
+def get_worker_count(script):
+    count = settings.OCR_WORKERS_EN if script == "english" else settings.OCR_WORKERS_NE
+    return max(1, count)
+
+def get_executor(script):
+    from app.ml.ocr.engines import bind_worker
+
+    with _LOCK:
+        executor = _EXECUTORS.get(script)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=get_worker_count(script),
+                thread_name_prefix=f"ocr-{script}",
+                initializer=bind_worker,
+                initargs=(script,)
+            )
+            _EXECUTORS[script] = executor
+        return executor
+
+def shutdown_executors(wait=True):
+    with _LOCK:
+        if not _EXECUTORS:
+            return   # Never used (e.g. inference on the model server): no engines to touch
+        for executor in _EXECUTORS.values():
+            executor.shutdown(wait=wait)
+        _EXECUTORS.clear()
+    from app.ml.ocr.engines import reset_worker_slots
+    reset_worker_slots()
@@ -1,6 +1,14 @@
+import contextvars
+import logging
+import math
 import cv2
 import numpy as np
-from app.ml.ocr.engines import get_paddle_ne, get_paddle_en
+from app.ml.ocr.engines import get_paddle_ne, get_paddle_en, get_rec_ne, get_rec_en
+from app.ml.ocr.executor import get_executor, get_worker_count
+from app.core.config import settings
+from app.core.metrics import OCR_CROPS, OCR_ENGINE_SECONDS
+
+logger = logging.getLogger(__name__)
 
 def ensure_rgb(image):
     if len(image.shape) == 2:
@@ -30,42 +38,184 @@ def parse_paddle_result(results):
                         text_list.append(line[0])
     return " ".join(text_list).strip()
 
-def run_ocr(target):
-    script = target.get("script", "english")
-    raw_crop = target.get("processed_crop")
-    
-    if raw_crop is None or raw_crop.size == 0:
-         return {"text": "", "engine": "error", "confidence_flag": "empty_crop"}
+def split_lines(crop, min_line_height=8, gap_tolerance=3, ink_ratio=0.02):
+    """
+    Cheap line splitter for multi-line text blocks.
+    Uses a horizontal projection profile (dark pixels per row) to find bands of text.
+    Returns a list of full-width strips, or [crop] if the block is a single line.
+    """
+    gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    profile = binary.sum(axis=1)
+    is_text = profile > max(1, ink_ratio * binary.shape[1])
+
+    # Start/end rows of every run of text rows
+    edges = np.diff(np.concatenate(([0], is_text.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) <= 1:
+        return [crop]
+
+    # Merge runs split by tiny gaps (matras, shirorekha breaks)
+    bands = [[starts[0], ends[0]]]
+    for y1, y2 in zip(starts[1:], ends[1:]):
+        if y1 - bands[-1][1] <= gap_tolerance:
+            bands[-1][1] = y2
+        else:
+            bands.append([y1, y2])
 
-    crop = ensure_rgb(raw_crop)
-    crop = np.ascontiguousarray(crop)
+    # Fold bands that are too thin to be a line (dots, noise) into their neighbour
+    lines = []
+    for band in bands:
+        if lines and (band[1] - band[0] < min_line_height or lines[-1][1] - lines[-1][0] < min_line_height):
+            lines[-1][1] = band[1]
+        else:
+            lines.append(band)
 
-    result = {"text": "", "engine": "", "confidence_flag": "normal"}
+    if len(lines) <= 1:
+        return [crop]
 
-    # SIMPLIFIED LOGIC: PADDLE ONLY
+    pad = gap_tolerance + 1
+    height = crop.shape[0]
+    return [
+        np.ascontiguousarray(crop[max(0, y1 - pad):min(height, y2 + pad)])
+        for y1, y2 in lines
+    ]
+
+def _get_reader(script):
     if script == "english":
         # Use English model for Back of card
-        reader = get_paddle_en()
-        engine = "paddle_en"
-    else:
-        # Use Nepali model for Front of card
-        # (Note: Nepali model handles English characters reasonably well too)
-        reader = get_paddle_ne()
-        engine = "paddle_ne"
+        return get_paddle_en(), "paddle_en"
+    # Use Nepali model for Front of card
+    # (Note: Nepali model handles English characters reasonably well too)
+    return get_paddle_ne(), "paddle_ne"
+
+def _get_recognizer(script):
+    if script == "english":
+        return get_rec_en(), "paddle_en_rec"
+    return get_rec_ne(), "paddle_ne_rec"
 
+def _ocr_single(reader, engine, crop):
     try:
         # Use default OCR call (includes detection + recognition)
         # We trust the V5 parser to handle the result
         paddle_results = reader.ocr(crop)
-        
-        # Debug print if you still want it
-        # print(f"DEBUG RAW PADDLE: {paddle_results}")
-        
-        text = parse_paddle_result(paddle_results)
+        return parse_paddle_result(paddle_results)
+    except Exception as e:
+        logger.warning(f"Paddle Error ({engine}): {e}")
+        return ""
+
+def _ocr_chunk(reader, engine, crops):
+    """Runs one engine call over a list of crops, returns one text per crop."""
+    if len(crops) == 1:
+        return [_ocr_single(reader, engine, crops[0])]
+
+    try:
+        # PaddleOCR v3 accepts a list of images and yields one result per image,
+        # so recognition runs over the text lines of the whole chunk in batches.
+        paddle_results = list(reader.ocr(crops))
+        if len(paddle_results) == len(crops):
+            return [parse_paddle_result([res]) for res in paddle_results]
+        logger.warning(f"Paddle Batch Warning ({engine}): got {len(paddle_results)} results for {len(crops)} crops")
+    except Exception as e:
+        logger.warning(f"Paddle Batch Error ({engine}): {e}")
+
+    # Fallback: one call per crop so a single bad crop does not blank the whole chunk
+    return [_ocr_single(reader, engine, crop) for crop in crops]
+
+def _det_rec_chunk(script, crops):
+    reader, engine = _get_reader(script)
+    OCR_CROPS.inc(len(crops), engine=engine)
+    with OCR_ENGINE_SECONDS.time(engine=engine):
+        texts = _ocr_chunk(reader, engine, crops)
+    return [{"text": text, "engine": engine, "confidence_flag": "normal"} for text in texts]
+
+def _rec_only_chunk(script, crops):
+    """
+    Recognition-only path: YOLO crops are split into lines and recognised directly,
+    skipping Paddle's text detector. Crops with low confidence are retried with det+rec.
+    """
+    recognizer, engine = _get_recognizer(script)
+
+    # 1. Split every crop into lines, remembering which crop each line came from
+    lines, owners = [], []
+    for idx, crop in enumerate(crops):
+        for line in split_lines(crop):
+            lines.append(line)
+            owners.append(idx)
+
+    texts = [[] for _ in crops]
+    scores = [[] for _ in crops]
+    OCR_CROPS.inc(len(crops), engine=engine)
+    try:
+        with OCR_ENGINE_SECONDS.time(engine=engine):
+            rec_results = list(recognizer.predict(input=lines, batch_size=settings.OCR_REC_BATCH_NUM))
+        for owner, res in zip(owners, rec_results):
+            text = (res.get("rec_text") or "").strip()
+            if text:
+                texts[owner].append(text)
+                scores[owner].append(float(res.get("rec_score", 0.0)))
     except Exception as e:
-        print(f"Paddle Error ({engine}): {e}")
-        text = ""
+        logger.warning(f"Paddle Rec Error ({engine}): {e}")
+
+    # 2. Low confidence -> fall back to the full detector for those crops only
+    results = [None] * len(crops)
+    retry = []
+    for idx in range(len(crops)):
+        confidence = sum(scores[idx]) / len(scores[idx]) if scores[idx] else 0.0
+        if confidence >= settings.OCR_REC_MIN_CONFIDENCE:
+            results[idx] = {"text": " ".join(texts[idx]), "engine": engine, "confidence_flag": "normal"}
+        else:
+            retry.append(idx)
+
+    if retry:
+        fallback = _det_rec_chunk(script, [crops[idx] for idx in retry])
+        for idx, res in zip(retry, fallback):
+            res["confidence_flag"] = "low_conf_fallback"
+            results[idx] = res
+
+    return results
 
-    result["text"] = text
-    result["engine"] = engine
-    return result
\ No newline at end of file
+def run_ocr_batch(targets, batch_size=None):
+    """
+    Runs OCR for all crops of a request.
+    Crops are grouped by script, each engine gets them in chunks of `batch_size`,
+    and results come back in the same order as `targets`.
+    """
+    batch_size = max(1, batch_size or settings.OCR_BATCH_SIZE)
+    ocr_chunk = _rec_only_chunk if settings.OCR_MODE == "rec_only" else _det_rec_chunk
+    results = [None] * len(targets)
+
+    # 1. Group valid crops by script (keeping their original position)
+    groups = {}
+    for idx, target in enumerate(targets):
+        raw_crop = target.get("processed_crop")
+        if raw_crop is None or raw_crop.size == 0:
+            results[idx] = {"text": "", "engine": "error", "confidence_flag": "empty_crop"}
+            continue
+
+        crop = np.ascontiguousarray(ensure_rgb(raw_crop))
+        groups.setdefault(target.get("script", "english"), []).append((idx, crop))
+
+    # 2. Submit chunks to each engine's executor (front and back run side by side,
+    #    and chunks of one face are spread over that engine's workers)
+    jobs = []
+    for script, items in groups.items():
+        executor = get_executor(script)
+        chunk_size = min(batch_size, math.ceil(len(items) / get_worker_count(script)))
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            # Run in a copy of this request's context, so its trace (request id, stages) follows
+            future = executor.submit(contextvars.copy_context().run, ocr_chunk, script, [crop for _, crop in chunk])
+            jobs.append((chunk, future))
+
+    # 3. Collect in submission order so the output is deterministic
+    for chunk, future in jobs:
+        for (idx, _), res in zip(chunk, future.result()):
+            results[idx] = res
+
+    return results
+
+def run_ocr(target):
+    """Single-crop convenience wrapper around `run_ocr_batch`."""
+    return run_ocr_batch([target])[0]
@@ -0,0 +1,201 @@
+"""
+INT8 post-training quantization, calibrated on a local folder of card images.
+
+    python -m app.ml.quantize yolo --calib calib_cards/
+    python -m app.ml.quantize rec --lang ne --calib calib_cards/ --out models/rec_ne_int8
+
+yolo: exports the FP32 ONNX graph (app/ml/detection/backends.py), then runs
+      ONNX Runtime static quantization (QDQ, per-channel) next to it.
+      Use with YOLO_BACKEND=onnx_int8.
+rec:  PaddleSlim static post-training quantization of a PaddleOCR recognition
+      model. Calibration lines are cut from the cards exactly like the live
+      pipeline does (YOLO text blocks -> padding -> line split).
+      Use with OCR_REC_MODEL_DIR_NE / OCR_REC_MODEL_DIR_EN.
+
+Check the result with benchmarks/eval_quantization.py before enabling it.
+Needs the optional onnx / onnxruntime (yolo) or paddleslim (rec) packages.
+"""
+import argparse
+import glob
+import os
+import shutil
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.ml.detection.backends import default_imgsz, export_model, int8_path
+from app.utils.image import prepare_image
+
+REC_INPUT_SHAPE = (3, 48, 320)   # PP-OCRv5 rec input (C, H, W)
+
+def _calibration_images(path, limit):
+    files = sorted(f for f in glob.glob(os.path.join(path, "*")) if os.path.isfile(f))[:limit]
+    if not files:
+        raise SystemExit(f"No calibration images in {path}")
+    for f in files:
+        with open(f, "rb") as fh:
+            yield prepare_image(fh.read())
+
+# --- YOLO (ONNX Runtime) ---
+
+def _letterbox(image, size):
+    """Same resize + grey (114) padding ultralytics applies before inference."""
+    h, w = image.shape[:2]
+    r = min(size / h, size / w)
+    new_w, new_h = round(w * r), round(h * r)
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    return cv2.copyMakeBorder(
+        resized, top, size - new_h - top, left, size - new_w - left,
+        cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+
+def _yolo_tensor(image, size):
+    # ultralytics treats numpy input as BGR and flips it; our arrays are RGB,
+    # so the network actually sees them flipped. Calibrate on what it sees.
+    img = _letterbox(image, size)[..., ::-1]
+    return np.ascontiguousarray(img.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+def quantize_yolo(calib_dir, limit=100, per_channel=True):
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    fp32_path = export_model("onnx")
+    target = int8_path()
+    input_name = onnx.load(fp32_path, load_external_data=False).graph.input[0].name
+    size = default_imgsz()
+
+    class CardReader(CalibrationDataReader):
+        def __init__(self):
+            self._images = _calibration_images(calib_dir, limit)
+
+        def get_next(self):
+            image = next(self._images, None)
+            return None if image is None else {input_name: _yolo_tensor(image, size)}
+
+    prepared = target + ".pre.onnx"
+    quant_pre_process(fp32_path, prepared)
+    try:
+        print(f"Calibrating YOLO INT8 on up to {limit} images from {calib_dir}...")
+        quantize_static(
+            prepared, target, CardReader(),
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            op_types_to_quantize=["Conv", "MatMul"]
+        )
+    finally:
+        os.remove(prepared)
+
+    # ultralytics reads class names / imgsz / task from the metadata; keep it
+    fp32, int8 = onnx.load(fp32_path), onnx.load(target)
+    del int8.metadata_props[:]
+    int8.metadata_props.extend(fp32.metadata_props)
+    onnx.save(int8, target)
+
+    print(f"Saved {target} ({os.path.getsize(fp32_path) >> 20} MB -> {os.path.getsize(target) >> 20} MB)")
+    return target
+
+# --- Paddle recognition (PaddleSlim) ---
+
+def _rec_tensor(line):
+    """Resize to 48px high keeping aspect (capped at 320 wide), right-pad, normalize to [-1, 1]."""
+    c, h, w = REC_INPUT_SHAPE
+    new_w = min(w, max(1, int(np.ceil(h * line.shape[1] / line.shape[0]))))
+    resized = cv2.resize(line, (new_w, h)).astype(np.float32)
+    resized = (resized / 255.0 - 0.5) / 0.5
+    out = np.zeros((h, w, c), dtype=np.float32)
+    out[:, :new_w] = resized
+    return out.transpose(2, 0, 1)
+
+def _calibration_lines(calib_dir, lang, limit):
+    """Text lines cut from the cards the same way the pipeline does."""
+    from app.ml.detection.yolo import detect_regions, process_cards
+    from app.ml.ocr.pipeline import split_lines
+
+    count = 0
+    for image in _calibration_images(calib_dir, limit):
+        for card in process_cards(detect_regions(image), image.shape):
+            # Same routing as the verifier: back -> english, everything else -> nepali
+            if (card["face"] == "back") != (lang == "en"):
+                continue
+            for region in card["regions"]:
+                if region["label"] != "text_block_primary":
+                    continue
+                x1, y1, x2, y2 = region["bbox"]
+                crop = cv2.copyMakeBorder(
+                    image[y1:y2, x1:x2], 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=[255, 255, 255]
+                )
+                for line in split_lines(crop):
+                    yield _rec_tensor(line)
+                    count += 1
+    if not count:
+        raise SystemExit(f"No {lang} text lines found in {calib_dir}")
+
+def _default_rec_dir(lang):
+    name = settings.OCR_REC_MODEL_NE if lang == "ne" else settings.OCR_REC_MODEL_EN
+    return os.path.join(os.path.expanduser("~"), ".paddlex", "official_models", name)
+
+def quantize_rec(calib_dir, lang, out_dir, model_dir=None, limit=100, batch_size=8, batch_nums=20):
+    import paddle
+    from paddleslim.quant import quant_post_static
+
+    model_dir = model_dir or _default_rec_dir(lang)
+    model_file = next((f for f in ("inference.pdmodel", "model.pdmodel") if os.path.exists(os.path.join(model_dir, f))), None)
+    if model_file is None:
+        raise SystemExit(
+            f"No .pdmodel program in {model_dir}. PaddleSlim needs the legacy program format "
+            "(export the model with FLAGS_enable_pir_api=0)."
+        )
+    params_file = model_file.replace(".pdmodel", ".pdiparams")
+
+    lines = list(_calibration_lines(calib_dir, lang, limit))
+    print(f"Calibrating rec ({lang}) INT8 on {len(lines)} text lines from {calib_dir}...")
+
+    paddle.enable_static()
+    quant_post_static(
+        executor=paddle.static.Executor(paddle.CPUPlace()),
+        model_dir=model_dir,
+        quantize_model_path=out_dir,
+        sample_generator=lambda: ((line,) for line in lines),
+        model_filename=model_file,
+        params_filename=params_file,
+        save_model_filename=model_file,
+        save_params_filename=params_file,
+        batch_size=batch_size,
+        batch_nums=batch_nums,
+        algo="KL",
+        quantizable_op_type=["conv2d", "depthwise_conv2d", "matmul", "matmul_v2", "mul"]
+    )
+
+    # PaddleX needs the model config (pre/post-processing, character dict) alongside
+    for name in os.listdir(model_dir):
+        if name.endswith((".yml", ".yaml", ".txt")):
+            shutil.copy(os.path.join(model_dir, name), out_dir)
+    print(f"Saved {out_dir}")
+    return out_dir
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization")
+    sub = parser.add_subparsers(dest="target", required=True)
+
+    p_yolo = sub.add_parser("yolo", help="YOLO detector -> ONNX Runtime INT8 (YOLO_BACKEND=onnx_int8)")
+    p_yolo.add_argument("--calib", required=True, help="Folder of card images")
+    p_yolo.add_argument("--limit", type=int, default=100)
+    p_yolo.add_argument("--per-tensor", action="store_true", help="Per-tensor instead of per-channel weights")
+
+    p_rec = sub.add_parser("rec", help="Paddle recognition model -> PaddleSlim INT8 (OCR_REC_MODEL_DIR_*)")
+    p_rec.add_argument("--calib", required=True, help="Folder of card images")
+    p_rec.add_argument("--lang", choices=["ne", "en"], required=True)
+    p_rec.add_argument("--out", required=True, help="Output model dir")
+    p_rec.add_argument("--model-dir", default=None, help="FP32 source model (default: PaddleX download cache)")
+    p_rec.add_argument("--limit", type=int, default=100)
+    p_rec.add_argument("--batch-nums", type=int, default=20)
+
+    args = parser.parse_args()
+    if args.target == "yolo":
+        quantize_yolo(args.calib, args.limit, per_channel=not args.per_tensor)
+    else:
+        quantize_rec(args.calib, args.lang, args.out, args.model_dir, args.limit, batch_nums=args.batch_nums)
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+
+class HistoryItem(BaseModel):
+    """List view row (no OCR / audit blobs)."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    timestamp: Optional[datetime]
+    status: Optional[str]
+    name_input: Optional[str]
+    id_input: Optional[str]
+    dob_input: Optional[str]
+    filename: Optional[str]
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None   # Pass back as `cursor` for the next page
+
+class HistoryRecord(HistoryItem):
+    """Detail view of one verification."""
+    audit_report: Optional[Dict[str, Any]]
+    taxonomy: Optional[Dict[str, int]]
+    ocr_data: Optional[List[Dict[str, Any]]]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Dict, Optional
+from datetime import date
+
+class StatsBucket(BaseModel):
+    date: date
+    verifications: int
+    errors: Dict[str, int]      # error_type -> occurrences
+    rates: Dict[str, float]     # error_type -> occurrences per verification
+
+class StatsResponse(BaseModel):
+    date_from: date
+    date_to: date
+    buckets: List[StatsBucket]
+    totals: Optional[StatsBucket] = None   # Whole range (date = date_from)
@@ -14,7 +14,23 @@ class AuditField(BaseModel):
     span: str
     error_type: str
 
+class SkippedRegion(BaseModel):
+    """A text region left un-OCRed because every field had already matched."""
+    face: str
+    script: str
+    box: List[int]
+
 class VerificationResponse(BaseModel):
     report: Dict[str, AuditField]
     taxonomy: Dict[str, int]
-    ocr_details: List[OCRDetail]
\ No newline at end of file
+    ocr_details: List[OCRDetail]
+    cache_hit: bool = False
+    skipped_regions: List[SkippedRegion] = []
+
+class BatchItemResult(BaseModel):
+    """One NDJSON line of /verify/batch."""
+    index: int
+    filename: str
+    status: str                 # "ok" | "error"
+    result: Optional[VerificationResponse] = None
+    error: Optional[str] = None
@@ -0,0 +1,120 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from app.core.config import settings
+
+class QueueFullError(Exception):
+    """Raised when the inference queue cannot take another job."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Bounded inference queue in front of process_verification.
+    At most `max_inflight` jobs run at once and at most `max_queue` wait for a slot.
+    Anything beyond that is rejected straight away instead of piling up.
+    Batch items wait in their own line: they don't count against `max_queue` and
+    only take a free slot when no interactive request is waiting for it.
+    """
+
+    def __init__(self, max_inflight, max_queue, queue_timeout):
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._waiting = 0
+        self._batch_waiting = 0
+        self._rejected = 0
+        self._last_wait = 0.0
+        self._avg_wait = 0.0      # Moving averages (seconds)
+        self._avg_service = 0.0
+
+    def _retry_after(self):
+        # Rough time until the current backlog drains, at least one second
+        backlog = self._waiting + 1
+        return max(1, math.ceil(self._avg_service * backlog / self.max_inflight))
+
+    @staticmethod
+    def _ewma(avg, value, alpha=0.2):
+        return value if avg == 0.0 else (1 - alpha) * avg + alpha * value
+
+    @contextmanager
+    def slot(self, blocking=False):
+        """
+        Waits for an inference slot and yields the time spent waiting (seconds).
+        `blocking=True` skips the queue limits and waits as long as needed, behind any
+        interactive waiters. Batch jobs use it, since their own worker pool already
+        bounds how many can wait.
+        """
+        wait_start = time.monotonic()
+        with self._cond:
+            # 1. Fast reject when every slot is busy and the queue is full
+            if not blocking and self._inflight >= self.max_inflight and self._waiting >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError("Inference queue is full.", self._retry_after())
+
+            # 2. Wait for a slot (bounded by the queue timeout, batch items yield to interactive ones)
+            if blocking:
+                self._batch_waiting += 1
+            else:
+                self._waiting += 1
+            try:
+                deadline = None if blocking else wait_start + self.queue_timeout
+                while self._inflight >= self.max_inflight or (blocking and self._waiting > 0):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._rejected += 1
+                        raise QueueFullError("Timed out waiting for an inference slot.", self._retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                if blocking:
+                    self._batch_waiting -= 1
+                else:
+                    self._waiting -= 1
+                    self._cond.notify_all()   # Batch waiters may have been held back for this one
+
+            self._inflight += 1
+            waited = time.monotonic() - wait_start
+            self._last_wait = waited
+            self._avg_wait = self._ewma(self._avg_wait, waited)
+
+        # 3. Run the job, then hand the slot to the next waiter
+        service_start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._inflight -= 1
+                self._avg_service = self._ewma(self._avg_service, time.monotonic() - service_start)
+                # Wake everyone: a woken batch waiter would go back to sleep if an interactive one is queued
+                self._cond.notify_all()
+
+    def is_saturated(self):
+        with self._cond:
+            return self._inflight >= self.max_inflight and self._waiting >= self.max_queue
+
+    def stats(self):
+        with self._cond:
+            return {
+                "inflight": self._inflight,
+                "max_inflight": self.max_inflight,
+                "queue_depth": self._waiting,
+                "batch_queue_depth": self._batch_waiting,
+                "max_queue_depth": self.max_queue,
+                "last_wait_ms": round(self._last_wait * 1000, 1),
+                "avg_wait_ms": round(self._avg_wait * 1000, 1),
+                "avg_service_ms": round(self._avg_service * 1000, 1),
+                "rejected_total": self._rejected,
+            }
+
+# Shared by every request handled in this worker process
+inference_gate = AdmissionController(
+    max_inflight=settings.MAX_INFLIGHT_JOBS,
+    max_queue=settings.MAX_QUEUE_DEPTH,
+    queue_timeout=settings.QUEUE_TIMEOUT_SECONDS
+)
@@ -1,7 +1,9 @@
 import re
 import datetime
-import nepali_datetime
-from app.utils.text import get_consonant_skeleton, fuzzy_match_score
+from functools import lru_cache
+from app.utils.bs_calendar import ad_to_bs
+from app.utils.text import get_consonant_skeleton
+from app.utils.matching import SkeletonMatcher
 from app.utils.nepali import normalize_to_eng_digits
 
 def verify_name(u_name, raw_text, norm_text):
@@ -18,11 +20,9 @@ def verify_name(u_name, raw_text, norm_text):
     
     score = 0
     if u_skeleton and ocr_skeleton:
-        if u_skeleton in ocr_skeleton:
-            score = 100 
-        else:
-            score = fuzzy_match_score(u_skeleton, ocr_skeleton)
-            if u_skeleton in ocr_skeleton: score = 100
+        # Best-matching window of the OCR skeleton, so unrelated text on the card
+        # no longer dilutes the score. One pass gives the score for every status below.
+        score = SkeletonMatcher(ocr_skeleton).score(u_skeleton)
 
     return {
         "score": score,
@@ -41,20 +41,23 @@ def verify_id_number(u_id, raw_text, norm_text):
     
     return {"score": 0, "status": "MISMATCH", "span": "Not Found", "error_type": "ID_DIGIT_MISREAD"}
 
+@lru_cache(maxsize=4096)
+def _dob_tokens(u_dob):
+    """Parses a YYYY-MM-DD entry once and returns the AD/BS dates with their search tokens."""
+    y_ad, m_ad, d_ad = map(int, u_dob.split('-'))
+    # Convert to BS
+    y_bs, m_bs, d_bs = ad_to_bs(datetime.date(y_ad, m_ad, d_ad))
+
+    # Tokens to search for
+    u_ad_tokens = frozenset({str(y_ad), f"{m_ad:02}", f"{d_ad:02}"})
+    u_bs_tokens = frozenset({str(y_bs), f"{m_bs:02}", f"{d_bs:02}", str(m_bs), str(d_bs)})
+    return (y_ad, m_ad, d_ad), (y_bs, m_bs, d_bs), u_ad_tokens, u_bs_tokens
+
 def verify_dob(u_dob, raw_text, norm_text):
     full_corpus = normalize_to_eng_digits(raw_text + " " + norm_text)
     
     try:
-        y_ad, m_ad, d_ad = map(int, u_dob.split('-'))
-        # Convert to BS
-        ad_date = datetime.date(y_ad, m_ad, d_ad)
-        bs_date = nepali_datetime.date.from_datetime_date(ad_date)
-        y_bs, m_bs, d_bs = bs_date.year, bs_date.month, bs_date.day
-        
-        # Tokens to search for
-        u_ad_tokens = {str(y_ad), f"{m_ad:02}", f"{d_ad:02}"}
-        u_bs_tokens = {str(y_bs), f"{m_bs:02}", f"{d_bs:02}", str(m_bs), str(d_bs)}
-
+        (y_ad, m_ad, d_ad), (y_bs, m_bs, d_bs), u_ad_tokens, u_bs_tokens = _dob_tokens(u_dob)
     except Exception as e:
         return {"score": 0, "status": "ERROR", "span": str(e), "error_type": "DATE_PARSE_ERR"}
 
@@ -68,6 +71,8 @@ def verify_dob(u_dob, raw_text, norm_text):
         
     return {"score": 0, "status": "MISMATCH", "span": f"Expected BS: {y_bs}", "error_type": "DOB_MISMATCH"}
 
+FIELD_CHECKS = {"name": verify_name, "id_number": verify_id_number, "dob": verify_dob}
+
 def generate_audit_report(ocr_results, user_entry):
     """Main entry point for the service."""
     combined_raw = " ".join([res.get('raw_text', '') for res in ocr_results])
@@ -84,4 +89,44 @@ def generate_audit_report(ocr_results, user_entry):
         e_type = f_data['error_type']
         tax_counts[e_type] = tax_counts.get(e_type, 0) + 1
         
-    return report, tax_counts
\ No newline at end of file
+    return report, tax_counts
+
+class IncrementalAuditor:
+    """
+    Audit state for OCR results that arrive in waves (AUDIT_EARLY_EXIT).
+    Each field keeps its result once it is MATCH; the others are re-checked
+    against all text seen so far, joined in region order like generate_audit_report.
+    """
+
+    def __init__(self, user_entry):
+        self.user_entry = user_entry
+        self.report = {}
+        self._seen = []   # (region position, ocr result)
+
+    def add(self, position, ocr_result):
+        self._seen.append((position, ocr_result))
+
+    def update(self):
+        """Re-checks the unresolved fields. True once every field is MATCH."""
+        ordered = [res for _, res in sorted(self._seen, key=lambda item: item[0])]
+        combined_raw = " ".join([res.get('raw_text', '') for res in ordered])
+        combined_norm = " ".join([res.get('text', '') for res in ordered])
+
+        for field, check in FIELD_CHECKS.items():
+            if self.report.get(field, {}).get('status') != "MATCH":
+                self.report[field] = check(self.user_entry.get(field, ''), combined_raw, combined_norm)
+        return self.resolved
+
+    @property
+    def resolved(self):
+        return all(self.report.get(field, {}).get('status') == "MATCH" for field in FIELD_CHECKS)
+
+def overall_status(report):
+    """Collapses the per-field statuses into one, for filtering history."""
+    statuses = {f_data.get('status') for f_data in (report or {}).values()}
+    if not statuses:
+        return "ERROR"
+    for status in ("ERROR", "MISMATCH", "PARTIAL"):
+        if status in statuses:
+            return status
+    return "MATCH"
@@ -0,0 +1,224 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas.verification import BatchItemResult
+from app.services.admission import inference_gate
+from app.services.verifier import process_verification
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+MANIFEST_NAMES = ("manifest.csv", "manifest.json")
+MANIFEST_FIELDS = ("name", "id_number", "dob")
+DISCONNECT_POLL_SECONDS = 1.0   # How often a running batch checks whether the client is still there
+
+class BatchInputError(ValueError):
+    """Raised when the uploaded archive / files / manifest cannot be used."""
+
+def parse_manifest(data, manifest_name):
+    """
+    Reads a CSV (filename,name,id_number,dob) or JSON manifest.
+    JSON may be a list of objects with a "filename" key, or an object keyed by filename.
+    Returns {basename: user_data}.
+    """
+    text = data.decode("utf-8-sig")
+    if manifest_name.lower().endswith(".json"):
+        payload = json.loads(text)
+        if isinstance(payload, dict):
+            rows = [{"filename": key, **value} for key, value in payload.items()]
+        else:
+            rows = payload
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+    manifest = {}
+    for row in rows:
+        filename = (row.get("filename") or "").strip()
+        if not filename:
+            raise BatchInputError("Every manifest entry needs a 'filename'.")
+        missing = [f for f in MANIFEST_FIELDS if not str(row.get(f) or "").strip()]
+        if missing:
+            raise BatchInputError(f"Manifest entry '{filename}' is missing: {', '.join(missing)}")
+        key = os.path.basename(filename)
+        if key in manifest:
+            raise BatchInputError(f"Manifest has more than one entry for '{key}' (entries are matched by file name).")
+        manifest[key] = {f: str(row[f]).strip() for f in MANIFEST_FIELDS}
+    return manifest
+
+def _spool(source, path, budget):
+    """Copies an upload to disk, stopping once more than `budget` bytes arrive. Returns bytes written."""
+    written = 0
+    with open(path, "wb") as out:
+        while True:
+            chunk = source.read(1 << 20)
+            if not chunk:
+                return written
+            written += len(chunk)
+            if written > budget:
+                raise BatchInputError(f"Upload is larger than {settings.BATCH_MAX_UPLOAD_MB} MB.")
+            out.write(chunk)
+
+def _check_archive(archive, members):
+    """
+    Rejects zip bombs before anything is extracted: too many entries, or members
+    whose declared size is too big (zipfile never returns more than the declared size).
+    """
+    entries = len(archive.infolist())
+    if entries > settings.BATCH_MAX_ARCHIVE_ENTRIES:
+        raise BatchInputError(f"Archive has {entries} entries, limit is {settings.BATCH_MAX_ARCHIVE_ENTRIES}.")
+
+    item_limit = settings.BATCH_MAX_ITEM_MB << 20
+    total = 0
+    for member in members:
+        size = archive.getinfo(member).file_size
+        if size > item_limit:
+            raise BatchInputError(f"'{member}' is larger than {settings.BATCH_MAX_ITEM_MB} MB uncompressed.")
+        total += size
+    if total > settings.BATCH_MAX_UNCOMPRESSED_MB << 20:
+        raise BatchInputError(f"Archive holds more than {settings.BATCH_MAX_UNCOMPRESSED_MB} MB uncompressed.")
+
+class BatchJob:
+    """
+    Spools a batch upload to a private temp dir, so the items outlive the request's
+    upload files while the NDJSON response streams. Image bytes are read lazily per item.
+    """
+
+    def __init__(self):
+        self.workdir = tempfile.mkdtemp(prefix="verify_batch_")
+        self.items = []       # (filename, path_or_zip_member)
+        self.manifest = {}
+        self._archive = None
+
+    @classmethod
+    def from_archive(cls, archive_file, manifest_file=None, manifest_name=None):
+        job = cls()
+        try:
+            archive_path = os.path.join(job.workdir, "upload.zip")
+            _spool(archive_file, archive_path, settings.BATCH_MAX_UPLOAD_MB << 20)
+            try:
+                job._archive = zipfile.ZipFile(archive_path)
+            except zipfile.BadZipFile:
+                raise BatchInputError("Archive is not a valid zip file.")
+
+            members = [m for m in job._archive.namelist() if not m.endswith("/") and "__MACOSX" not in m]
+            images = [m for m in sorted(members) if m.lower().endswith(IMAGE_EXTENSIONS)]
+            inner = None
+            if manifest_file is None:
+                inner = next((m for m in members if os.path.basename(m).lower() in MANIFEST_NAMES), None)
+                if inner is None:
+                    raise BatchInputError("No manifest uploaded and none found in the archive.")
+            _check_archive(job._archive, images + ([inner] if inner else []))
+
+            if manifest_file is not None:
+                job.manifest = parse_manifest(manifest_file.read(), manifest_name or "manifest.csv")
+            else:
+                job.manifest = parse_manifest(job._archive.read(inner), inner)
+
+            job.items = [(os.path.basename(m), m) for m in images]
+            job._check_size()
+            return job
+        except Exception:
+            job.close()
+            raise
+
+    @classmethod
+    def from_files(cls, files, manifest_file, manifest_name):
+        job = cls()
+        try:
+            job.manifest = parse_manifest(manifest_file.read(), manifest_name)
+            if len(files) > settings.BATCH_MAX_ITEMS:
+                raise BatchInputError(f"Batch has {len(files)} images, limit is {settings.BATCH_MAX_ITEMS}.")
+            budget = settings.BATCH_MAX_UPLOAD_MB << 20
+            for idx, upload in enumerate(files):
+                path = os.path.join(job.workdir, f"{idx:06d}")
+                budget -= _spool(upload.file, path, budget)
+                job.items.append((os.path.basename(upload.filename or f"file_{idx}"), path))
+            job._check_size()
+            return job
+        except Exception:
+            job.close()
+            raise
+
+    def _check_size(self):
+        if not self.items:
+            raise BatchInputError("Batch contains no images.")
+        if len(self.items) > settings.BATCH_MAX_ITEMS:
+            raise BatchInputError(f"Batch has {len(self.items)} images, limit is {settings.BATCH_MAX_ITEMS}.")
+        # The manifest is matched by file name, so a/x.jpg and b/x.jpg would share one entry
+        seen = set()
+        for filename, _ in self.items:
+            if filename in seen:
+                raise BatchInputError(f"More than one image is named '{filename}'; file names must be unique.")
+            seen.add(filename)
+
+    def read(self, source):
+        if self._archive is not None:
+            return self._archive.read(source)
+        with open(source, "rb") as f:
+            return f.read()
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+def _verify_item(job, index, filename, source):
+    user_data = job.manifest.get(filename)
+    if user_data is None:
+        return BatchItemResult(index=index, filename=filename, status="error", error="No manifest entry for this file.")
+
+    db = SessionLocal()
+    try:
+        file_bytes = job.read(source)
+        # Batch jobs wait for a slot instead of being rejected; BATCH_WORKERS bounds them
+        with inference_gate.slot(blocking=True):
+            result = process_verification(file_bytes=file_bytes, user_data=user_data, db=db, filename=filename)
+        return BatchItemResult(index=index, filename=filename, status="ok", result=result)
+    except Exception as e:
+        logger.exception("Batch item failed", extra={"item": filename})
+        return BatchItemResult(index=index, filename=filename, status="error", error=str(e))
+    finally:
+        db.close()
+
+def _close_when_done(job, running):
+    # Items already running still read from the job; remove its files after them
+    wait(running)
+    job.close()
+
+async def stream_batch(job, request):
+    """
+    Runs the batch on a bounded pool and yields one NDJSON line per item as it finishes.
+    Stops when the client disconnects: items not started yet are cancelled, so they
+    never take an inference slot, and nothing here blocks the event loop.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, settings.BATCH_WORKERS), thread_name_prefix="verify-batch")
+    futures = []
+    try:
+        futures = [
+            executor.submit(_verify_item, job, index, filename, source)
+            for index, (filename, source) in enumerate(job.items)
+        ]
+        pending = {asyncio.wrap_future(future) for future in futures}
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=DISCONNECT_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result().model_dump_json() + "\n"
+            if pending and await request.is_disconnected():
+                logger.info(f"Batch client disconnected, cancelling {len(pending)} items")
+                break
+    finally:
+        # Client gone or batch done: drop the queued items and clean up in the background
+        running = [future for future in futures if not future.cancel()]
+        executor.shutdown(wait=False)
+        threading.Thread(target=_close_when_done, args=(job, running), name="verify-batch-cleanup", daemon=True).start()
@@ -0,0 +1,236 @@
+import base64
+import cv2
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+from app.core.config import settings
+from app.ml.detection.backends import _file_digest
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_SIZE = (256, 160)   # Grayscale thumbnail (width, height), card text still visible
+FINGERPRINT_TILE = 16
+
+def _model_files(path):
+    """What is on disk at `path`: the .pt contents, or each file's size and mtime in a model dir."""
+    if not path:
+        return None
+    if os.path.isfile(path):
+        return _file_digest(path)
+    if os.path.isdir(path):
+        return sorted(
+            (os.path.relpath(os.path.join(root, name), path), os.path.getsize(os.path.join(root, name)),
+             os.stat(os.path.join(root, name)).st_mtime_ns)
+            for root, _, names in os.walk(path) for name in names
+        )
+    return None
+
+@lru_cache(maxsize=None)
+def model_variant():
+    """
+    Everything that changes the OCR output of the same image. Part of every key.
+    Includes the model files themselves, so a new model at the same path doesn't
+    get the old one's results from the persistent tier. Computed once per process,
+    like the models, which are also loaded once.
+    """
+    parts = (
+        settings.YOLO_MODEL_PATH, settings.YOLO_BACKEND, settings.YOLO_IMGSZ,
+        settings.YOLO_CASCADE_ENABLED, settings.YOLO_COARSE_IMGSZ, settings.YOLO_FINE_IMGSZ,
+        settings.OCR_MODE, settings.OCR_REC_MODEL_NE, settings.OCR_REC_MODEL_EN,
+        settings.OCR_REC_MODEL_DIR_NE, settings.OCR_REC_MODEL_DIR_EN,
+        _model_files(settings.YOLO_MODEL_PATH),
+        _model_files(settings.OCR_REC_MODEL_DIR_NE), _model_files(settings.OCR_REC_MODEL_DIR_EN),
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:12]
+
+def content_key(file_bytes):
+    """Exact key: hash of the uploaded bytes."""
+    return f"{model_variant()}:sha256:" + hashlib.sha256(file_bytes).hexdigest()
+
+def perceptual_key(img_array):
+    """
+    Loose key: 64-bit difference hash (dHash) of the prepared image.
+    Only a bucket: different cards on the same template can share it, so a
+    hit must be confirmed with `same_scan` before its OCR is used.
+    """
+    gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{model_variant()}:dhash:{value:016x}"
+
+def scan_fingerprint(img_array):
+    """Small grayscale thumbnail (PNG, base64) kept with a perceptual entry."""
+    gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    thumb = cv2.resize(gray, FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA)
+    return base64.b64encode(cv2.imencode(".png", thumb)[1].tobytes()).decode()
+
+def _decode_fingerprint(fingerprint):
+    data = np.frombuffer(base64.b64decode(fingerprint), dtype=np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_GRAYSCALE).astype(np.int16)
+
+def same_scan(fingerprint_a, fingerprint_b, max_tile_diff=None):
+    """
+    True if two thumbnails show the same scan: every 16x16 tile must agree.
+    Re-encoding moves tiles by a few gray levels; another name or number on the
+    same template changes the tiles holding that text by far more.
+    """
+    max_tile_diff = settings.RESULT_CACHE_PHASH_MAX_TILE_DIFF if max_tile_diff is None else max_tile_diff
+    a, b = _decode_fingerprint(fingerprint_a), _decode_fingerprint(fingerprint_b)
+    if a.shape != b.shape:
+        return False
+    diff = np.abs(a - b)
+    h, w = diff.shape
+    t = FINGERPRINT_TILE
+    tiles = diff[:h - h % t, :w - w % t].reshape(h // t, t, w // t, t).mean(axis=(1, 3))
+    return float(tiles.max()) <= max_tile_diff
+
+class ResultCache:
+    """
+    OCR result cache for re-submitted images.
+    Memory tier: LRU with TTL and a byte-size cap (entries are stored as JSON text,
+    so the cap is exact and every hit hands out a fresh copy).
+    Optional SQLite tier at `persist_path` survives restarts. It is shared by every
+    worker, so its errors ("database is locked") are logged and counted, and the
+    lookup falls back to the memory tier instead of failing the request.
+    """
+
+    def __init__(self, max_bytes, ttl_seconds, persist_path=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()   # key -> (expires_at, payload)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._rejected = 0
+        self._writes = 0
+        self._db_errors = 0
+
+        self.persist_path = persist_path
+        self._db = None
+        if persist_path:
+            os.makedirs(os.path.dirname(os.path.abspath(persist_path)), exist_ok=True)
+            self._db = self._connect()
+
+    def _connect(self):
+        db = sqlite3.connect(self.persist_path, check_same_thread=False)
+        db.execute("CREATE TABLE IF NOT EXISTS ocr_cache (key TEXT PRIMARY KEY, expires_at REAL, payload TEXT)")
+        db.commit()
+        return db
+
+    def reopen(self):
+        """New lock and SQLite connection in a forked worker (neither may cross a fork)."""
+        self._lock = threading.Lock()
+        if self._db is not None:
+            self._db = self._connect()
+
+    # --- Memory tier ---
+
+    def _drop(self, key):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def _store(self, key, expires_at, payload):
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (expires_at, payload)
+        self._bytes += len(payload)
+        # Evict least recently used until we fit the cap
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _db_failed(self, action, error):
+        # Called with the lock held
+        self._db_errors += 1
+        logger.warning(f"Result cache: SQLite {action} failed: {error}")
+        try:
+            self._db.rollback()
+        except sqlite3.Error:
+            pass
+
+    # --- Public API ---
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return json.loads(entry[1])
+                self._drop(key)
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT expires_at, payload FROM ocr_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    self._db_failed("read", e)
+                    row = None
+                if row is not None and row[0] > now:
+                    self._store(key, row[0], row[1])
+                    self._hits += 1
+                    return json.loads(row[1])
+
+            self._misses += 1
+            return None
+
+    def set(self, key, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, expires_at, payload)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO ocr_cache (key, expires_at, payload) VALUES (?, ?, ?)",
+                        (key, expires_at, payload)
+                    )
+                    self._writes += 1
+                    # Purge expired rows now and then
+                    if self._writes % 100 == 0:
+                        self._db.execute("DELETE FROM ocr_cache WHERE expires_at <= ?", (time.time(),))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    # Still cached in memory for this worker
+                    self._db_failed("write", e)
+
+    def reject(self):
+        """A perceptual hit that failed confirmation: count it as a miss."""
+        with self._lock:
+            self._hits -= 1
+            self._misses += 1
+            self._rejected += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "phash_rejected": self._rejected,
+                "persistent": self._db is not None,
+                "db_errors": self._db_errors,
+            }
+
+result_cache = ResultCache(
+    max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    persist_path=settings.RESULT_CACHE_PATH
+) if settings.RESULT_CACHE_ENABLED else None
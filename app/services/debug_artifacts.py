@@ -0,0 +1,115 @@
+import cv2
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class DebugArtifactWriter:
+    """
+    Writes debug crops off the request path.
+    Requests only enqueue arrays; a background thread JPEG-encodes and writes them.
+    The queue is bounded and full means drop (never block a request), and the
+    directory is pruned by age and total size.
+    """
+
+    def __init__(self, directory, queue_size, max_bytes, max_age_seconds, sample_rate):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age_seconds
+        self.sample_rate = sample_rate
+
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._thread = None
+        self._lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def should_capture(self, requested=False):
+        """Per-request opt-in, or a random sample of all requests."""
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def new_tag(self):
+        """Prefix shared by all crops of one request."""
+        return f"{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+    def submit(self, name, image_rgb):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((name, image_rgb))
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                os.makedirs(self.directory, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name="debug-artifacts", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            name, image_rgb = self._queue.get()
+            try:
+                # cv2 expects BGR, but we have RGB. Convert for saving.
+                ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR))
+                if not ok:
+                    raise ValueError("JPEG encoding failed")
+                with open(os.path.join(self.directory, name), "wb") as f:
+                    f.write(encoded.tobytes())
+                with self._lock:
+                    self._written += 1
+                    written = self._written
+                if written % 50 == 0:
+                    self._enforce_retention()
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                logger.warning(f"Debug artifact write failed ({name}): {e}")
+
+    def _enforce_retention(self):
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.max_age:
+                os.remove(entry.path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        # Over the size cap: delete oldest first
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "sample_rate": self.sample_rate,
+            }
+
+debug_writer = DebugArtifactWriter(
+    directory=settings.DEBUG_CROPS_DIR,
+    queue_size=settings.DEBUG_CROPS_QUEUE_SIZE,
+    max_bytes=settings.DEBUG_CROPS_MAX_MB * 1024 * 1024,
+    max_age_seconds=settings.DEBUG_CROPS_MAX_AGE_HOURS * 3600,
+    sample_rate=settings.DEBUG_CROPS_SAMPLE_RATE
+)
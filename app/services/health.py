@@ -0,0 +1,43 @@
+from sqlalchemy import text
+from app.core import topology
+from app.core.config import settings
+from app.db.session import engine
+from app.ml.model_loader import preload_status
+from app.ml.model_server import get_service
+
+def check_database():
+    """Round-trip to the database (SELECT 1)."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {"ok": True}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+def _ping_model_server():
+    try:
+        return get_service().ping()
+    except (ConnectionError, EOFError, OSError):
+        # Server restarted since we connected; reconnect once
+        return get_service(reconnect=True).ping()
+
+def check_models():
+    """In-process models loaded and warm, or the model server answering."""
+    if settings.MODEL_SERVER_ENABLED:
+        try:
+            return {"ok": True, "model_server": _ping_model_server()}
+        except Exception as e:
+            return {"ok": False, "model_server": None, "error": str(e)}
+
+    status = preload_status()
+    return {"ok": status["status"] == "ready", **status}
+
+def readiness():
+    models = check_models()
+    database = check_database()
+    return {
+        "ready": models["ok"] and database["ok"],
+        "models": models,
+        "database": database,
+        "topology": topology.report()
+    }
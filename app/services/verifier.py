@@ -1,52 +1,34 @@
 import cv2
-import uuid
-import os
-import numpy as np
+import logging
 from sqlalchemy.orm import Session
-from PIL import Image, ImageOps
-import io
 
-# Imports from our new layers
-from app.ml.detection.yolo import detect_regions, process_cards
-from app.ml.ocr.pipeline import run_ocr
+# Imports from our new layers (YOLO and Paddle are imported where they run, so API
+# workers that send images to the model server never load torch / paddle)
 from app.utils.text import process_robust_text
-from app.services.auditor import generate_audit_report
-from app.db.repositories import create_verification_record
-
-def prepare_image(file_bytes):
-    image = Image.open(io.BytesIO(file_bytes))
-    image = ImageOps.exif_transpose(image).convert("RGB")
-
-    max_dimension = 1800
-    if max(image.size) > max_dimension:
-        # Calculate new size maintaining aspect ratio
-        scale = max_dimension / max(image.size)
-        new_size = (int(image.width * scale), int(image.height * scale))
-        image = image.resize(new_size, Image.Resampling.LANCZOS)
-
-        # print(f"DEBUG: Resized image to {new_size}")
-    # ---------------------------------------
-    return np.array(image)
-
-def process_verification(file_bytes: bytes, user_data: dict, db: Session, filename: str = None):
-    # 1. Read Image
-    img_array = prepare_image(file_bytes)
-    
-    # 2. Detection (YOLO)
-    raw_detections = detect_regions(img_array)
-    cards = process_cards(raw_detections, img_array.shape)
-    
-    all_ocr_results = []
+from app.utils.image import prepare_image
+from app.services.auditor import generate_audit_report, IncrementalAuditor, overall_status
+from app.db.repositories import create_verification_record, enqueue_verification_record
+from app.ml.model_server import extract_ocr_results_remote
+from app.services.debug_artifacts import debug_writer
+from app.services.cache import result_cache, content_key, perceptual_key, scan_fingerprint, same_scan
+from app.core.config import settings
+from app.core.metrics import (
+    stage, annotate, FACES_DETECTED, REGIONS_PER_CARD, OCR_CONF_FLAGS, VERIFICATIONS, AUDIT_SKIPPED_REGIONS
+)
+
+logger = logging.getLogger(__name__)
+
+def build_ocr_targets(img_array, cards, debug_tag=None):
+    """Padded text crops of every card, tagged with the OCR script to use."""
+    targets = []
 
-    # 3. Processing Loop
     for card in cards:
         script = "english" if card["face"] == "back" else "nepali"
         
         # Filter for text regions
         text_regions = [d for d in card["regions"] if d["label"] == "text_block_primary"]
         
-        # DEBUG: Print how many regions were found
-        print(f"DEBUG: Found {len(text_regions)} text blocks on {card['face']} face.")
+        logger.debug(f"Found {len(text_regions)} text blocks on {card['face']} face.")
 
         for region in text_regions:
             x1, y1, x2, y2 = region["bbox"]
@@ -57,41 +39,170 @@ def process_verification(file_bytes: bytes, user_data: dict, db: Session, filena
                 raw_crop, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=[255, 255, 255]
             )
             
-            # --- DEBUG: SAVE CROP TO DISK ---
-            debug_filename = f"debug_crops/{script}_{uuid.uuid4().hex[:6]}.jpg"
-            # cv2 expects BGR, but we have RGB. Convert for saving.
-            cv2.imwrite(debug_filename, cv2.cvtColor(processed_crop, cv2.COLOR_RGB2BGR))
-            print(f"DEBUG: Saved crop to {debug_filename}")
-            # -------------------------------
+            # Debug crops are written by a background thread (dropped if it falls behind)
+            if debug_tag:
+                debug_writer.submit(f"{debug_tag}_{script}_{len(targets):02d}.jpg", processed_crop)
             
-            target = {
+            targets.append({
                 "script": script,
                 "processed_crop": processed_crop,
-                "metadata": {"box": region["bbox"]}
-            }
-            
-            # Run OCR
-            ocr_result = run_ocr(target)
-            
-            # ... rest of the loop remains same ...
-            raw_text = ocr_result["text"]
-            normalized_text = process_robust_text(raw_text)
-            
-            all_ocr_results.append({
-                "face": card["face"],
-                "raw_text": raw_text,
-                "text": normalized_text,
-                "engine": ocr_result["engine"],
-                "conf_flag": ocr_result.get("confidence_flag", "unknown")
+                "metadata": {"box": region["bbox"], "face": card["face"]}
             })
 
+    return targets
+
+def _normalize(targets, ocr_results):
+    """Raw OCR output -> the per-region results the auditor and the response use."""
+    results = []
+    for target, ocr_result in zip(targets, ocr_results):
+        raw_text = ocr_result["text"]
+        normalized_text = process_robust_text(raw_text)
+        
+        results.append({
+            "face": target["metadata"]["face"],
+            "raw_text": raw_text,
+            "text": normalized_text,
+            "engine": ocr_result["engine"],
+            "conf_flag": ocr_result.get("confidence_flag", "unknown")
+        })
+    return results
+
+def _region_priority(target):
+    """Most useful regions first: by face (AUDIT_FACE_ORDER), then top to bottom, left to right."""
+    faces = [f.strip() for f in settings.AUDIT_FACE_ORDER.split(",")]
+    face = target["metadata"]["face"]
+    x1, y1 = target["metadata"]["box"][:2]
+    return (faces.index(face) if face in faces else len(faces), y1, x1)
+
+def _ocr_early_exit(targets, user_entry):
+    """
+    OCRs the regions in waves of AUDIT_WAVE_SIZE, most useful first, and stops
+    as soon as every audited field is MATCH.
+    Returns the results (in region order) and the positions of the skipped regions.
+    """
+    from app.ml.ocr.pipeline import run_ocr_batch
+
+    order = sorted(range(len(targets)), key=lambda i: _region_priority(targets[i]))
+    wave_size = max(1, settings.AUDIT_WAVE_SIZE)
+    auditor = IncrementalAuditor(user_entry)
+    done = {}
+
+    for start in range(0, len(order), wave_size):
+        wave = order[start:start + wave_size]
+        wave_targets = [targets[i] for i in wave]
+        with stage("ocr"):
+            ocr_results = run_ocr_batch(wave_targets)
+        with stage("text_normalize"):
+            for i, result in zip(wave, _normalize(wave_targets, ocr_results)):
+                done[i] = result
+                auditor.add(i, result)
+        if auditor.update():
+            break
+
+    skipped = [i for i in order if i not in done]
+    return [done[i] for i in sorted(done)], skipped
+
+def extract_ocr_results(img_array, capture_debug=False, user_entry=None):
+    """
+    ML part of the pipeline: detection + OCR on a prepared image.
+    Runs in-process, or inside a model server worker (see app/ml/model_server.py).
+    `capture_debug` hands the padded crops to the background debug writer.
+    With AUDIT_EARLY_EXIT and a `user_entry`, OCR stops once every field matches.
+    Returns (ocr results, skipped regions).
+    """
+    from app.ml.detection.yolo import detect_regions, process_cards
+    from app.ml.ocr.pipeline import run_ocr_batch
+
+    debug_tag = debug_writer.new_tag() if capture_debug else None
 
-    # 4. Audit (Compare Logic)
-    audit_report, taxonomy = generate_audit_report(all_ocr_results, user_data)
+    # 1. Detection (YOLO)
+    with stage("detect"):
+        raw_detections = detect_regions(img_array)
+        cards = process_cards(raw_detections, img_array.shape)
+
+    for card in cards:
+        FACES_DETECTED.inc(face=card["face"])
+        REGIONS_PER_CARD.observe(len(card["regions"]), face=card["face"])
+    annotate(faces=[card["face"] for card in cards], regions=len(raw_detections))
     
-    # 5. Save to DB
-    create_verification_record(
-        db=db,
+    # 2. Collect every text crop of the request
+    targets = build_ocr_targets(img_array, cards, debug_tag)
+
+    # 3. Run OCR (batched per engine, results keep region order)
+    skipped = []
+    if settings.AUDIT_EARLY_EXIT and user_entry is not None:
+        all_ocr_results, skipped = _ocr_early_exit(targets, user_entry)
+    else:
+        with stage("ocr"):
+            ocr_results = run_ocr_batch(targets)
+        with stage("text_normalize"):
+            all_ocr_results = _normalize(targets, ocr_results)
+
+    for result in all_ocr_results:
+        OCR_CONF_FLAGS.inc(flag=result["conf_flag"])
+
+    skipped_regions = []
+    for i in skipped:
+        meta = targets[i]["metadata"]
+        AUDIT_SKIPPED_REGIONS.inc(face=meta["face"])
+        skipped_regions.append({"face": meta["face"], "script": targets[i]["script"], "box": list(meta["box"])})
+    annotate(text_blocks=len(all_ocr_results), skipped_regions=len(skipped_regions))
+
+    return all_ocr_results, skipped_regions
+
+def _run_ml(img_array, capture_debug, user_entry=None):
+    # Detection + OCR (locally, or on the model server via shared memory)
+    # (Per-stage metrics of remote runs are recorded in the model server process)
+    if settings.MODEL_SERVER_ENABLED:
+        with stage("model_server"):
+            return extract_ocr_results_remote(img_array, capture_debug, user_entry)
+    return extract_ocr_results(img_array, capture_debug, user_entry)
+
+def process_verification(file_bytes: bytes, user_data: dict, db: Session, filename: str = None, debug: bool = False):
+    all_ocr_results = None
+    skipped_regions = []
+    cache_keys = []
+
+    # 1. Cache lookup on the raw upload (a hit skips decode and all ML)
+    if result_cache is not None:
+        with stage("cache_lookup"):
+            cache_keys.append(content_key(file_bytes))
+            all_ocr_results = result_cache.get(cache_keys[0])
+
+    cache_hit = all_ocr_results is not None
+    if not cache_hit:
+        # 2. Read Image (+ optional perceptual lookup for re-encoded copies)
+        with stage("decode"):
+            img_array = prepare_image(file_bytes)
+        fingerprint = None
+        if result_cache is not None and settings.RESULT_CACHE_PHASH:
+            # The dHash only finds candidates; the thumbnail comparison decides
+            fingerprint = scan_fingerprint(img_array)
+            cache_keys.append(perceptual_key(img_array))
+            entry = result_cache.get(cache_keys[1])
+            if entry is not None:
+                if same_scan(entry["fingerprint"], fingerprint):
+                    all_ocr_results = entry["ocr"]
+                else:
+                    result_cache.reject()
+            cache_hit = all_ocr_results is not None
+
+        if not cache_hit:
+            user_entry = user_data if settings.AUDIT_EARLY_EXIT else None
+            all_ocr_results, skipped_regions = _run_ml(img_array, debug_writer.should_capture(debug), user_entry)
+
+        # Truncated OCR only answers this user entry, so it is not cached
+        if result_cache is not None and not skipped_regions:
+            result_cache.set(cache_keys[0], all_ocr_results)
+            if fingerprint is not None:
+                result_cache.set(cache_keys[1], {"ocr": all_ocr_results, "fingerprint": fingerprint})
+
+    # 3. Audit (Compare Logic, depends on the form fields so it always runs)
+    with stage("audit"):
+        audit_report, taxonomy = generate_audit_report(all_ocr_results, user_data)
+    
+    # 4. Save to DB (queued for a bulk insert in write-behind mode)
+    record = dict(
         name=user_data["name"],
         id_number=user_data["id_number"],
         dob=user_data["dob"],
@@ -100,9 +211,20 @@ def process_verification(file_bytes: bytes, user_data: dict, db: Session, filena
         ocr_data=all_ocr_results,
         filename=filename
     )
+    with stage("db_write"):
+        if settings.DB_WRITE_MODE == "write_behind":
+            enqueue_verification_record(**record)
+        else:
+            create_verification_record(db=db, **record)
+
+    status = overall_status(audit_report)
+    VERIFICATIONS.inc(status=status, cache_hit=str(cache_hit).lower())
+    annotate(verification_status=status, cache_hit=cache_hit)
     
     return {
         "report": audit_report,
         "taxonomy": taxonomy,
-        "ocr_details": all_ocr_results
+        "ocr_details": all_ocr_results,
+        "cache_hit": cache_hit,
+        "skipped_regions": skipped_regions
     }
\ No newline at end of file
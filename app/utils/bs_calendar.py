@@ -0,0 +1,172 @@
+"""
+Array-backed AD <-> BS (Bikram Sambat) calendar.
+
+The table is generated once per process from nepali_datetime on first use (or
+loaded from BS_CALENDAR_TABLE_PATH), after which both directions are plain
+array indexing:
+  * AD -> BS: one packed int (y*10000 + m*100 + d) per day of the supported range
+  * BS -> AD: day offset of every BS month start
+The *_many functions do the same over whole numpy columns, e.g. `dob_input`
+when re-auditing history.
+
+    python -m app.utils.bs_calendar models/bs_calendar.npz   # pre-generate the table
+"""
+import datetime
+import os
+import sys
+import threading
+import numpy as np
+from app.core.config import settings
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+_TABLE = None
+_LOCK = threading.Lock()
+
+class CalendarTable:
+    def __init__(self, min_year, start_ordinal, month_starts, day_to_bs):
+        self.min_year = int(min_year)                # First supported BS year
+        self.start_ordinal = int(start_ordinal)      # AD ordinal of BS min_year-01-01
+        self.month_starts = month_starts             # Day offset per BS month (+ end sentinel)
+        self.day_to_bs = day_to_bs                   # Packed BS date per day offset
+        self.max_year = self.min_year + (len(month_starts) - 1) // 12 - 1
+
+    @property
+    def ad_range(self):
+        first = datetime.date.fromordinal(self.start_ordinal)
+        last = datetime.date.fromordinal(self.start_ordinal + len(self.day_to_bs) - 1)
+        return first, last
+
+def build_table():
+    """Generates the table from nepali_datetime (about 1.5k month lookups, done once)."""
+    import nepali_datetime
+
+    min_year, max_year = nepali_datetime.MINYEAR, nepali_datetime.MAXYEAR
+    start_ordinal = nepali_datetime.date(min_year, 1, 1).to_datetime_date().toordinal()
+
+    month_starts = []
+    for year in range(min_year, max_year + 1):
+        for month in range(1, 13):
+            ordinal = nepali_datetime.date(year, month, 1).to_datetime_date().toordinal()
+            month_starts.append(ordinal - start_ordinal)
+
+    # End sentinel: the day after the last day of the last supported month
+    last_day = next(d for d in range(32, 27, -1) if _is_valid_bs(nepali_datetime, max_year, 12, d))
+    month_starts.append(month_starts[-1] + last_day)
+    month_starts = np.array(month_starts, dtype=np.int32)
+
+    lengths = np.diff(month_starts)
+    years = np.repeat(np.arange(min_year, max_year + 1).repeat(12), lengths)
+    months = np.repeat(np.tile(np.arange(1, 13), max_year - min_year + 1), lengths)
+    days = np.arange(month_starts[-1]) - np.repeat(month_starts[:-1], lengths) + 1
+    day_to_bs = (years * 10000 + months * 100 + days).astype(np.int32)
+
+    return CalendarTable(min_year, start_ordinal, month_starts, day_to_bs)
+
+def _is_valid_bs(nepali_datetime, year, month, day):
+    try:
+        nepali_datetime.date(year, month, day)
+        return True
+    except ValueError:
+        return False
+
+def save_table(table, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez_compressed(
+        path,
+        meta=np.array([table.min_year, table.start_ordinal], dtype=np.int64),
+        month_starts=table.month_starts,
+        day_to_bs=table.day_to_bs
+    )
+
+def load_table():
+    with np.load(settings.BS_CALENDAR_TABLE_PATH) as data:
+        min_year, start_ordinal = data["meta"]
+        return CalendarTable(min_year, start_ordinal, data["month_starts"], data["day_to_bs"])
+
+def get_table():
+    global _TABLE
+    if _TABLE is None:
+        with _LOCK:
+            if _TABLE is None:
+                path = settings.BS_CALENDAR_TABLE_PATH
+                _TABLE = load_table() if path and os.path.exists(path) else build_table()
+    return _TABLE
+
+# --- Scalar API ---
+
+def ad_to_bs(ad_date):
+    """datetime.date -> (year, month, day) in BS."""
+    table = get_table()
+    offset = ad_date.toordinal() - table.start_ordinal
+    if not 0 <= offset < len(table.day_to_bs):
+        first, last = table.ad_range
+        raise ValueError(f"Date out of supported range ({first} to {last}).")
+    packed = int(table.day_to_bs[offset])
+    return packed // 10000, packed // 100 % 100, packed % 100
+
+def bs_to_ad(year, month, day):
+    """BS (year, month, day) -> datetime.date."""
+    table = get_table()
+    index = (year - table.min_year) * 12 + (month - 1)
+    if not (table.min_year <= year <= table.max_year and 1 <= month <= 12):
+        raise ValueError(f"BS date out of supported range ({table.min_year} to {table.max_year}).")
+    length = table.month_starts[index + 1] - table.month_starts[index]
+    if not 1 <= day <= length:
+        raise ValueError(f"Day out of range for BS {year}-{month:02d} ({length} days).")
+    return datetime.date.fromordinal(table.start_ordinal + int(table.month_starts[index]) + day - 1)
+
+# --- Vectorized API ---
+
+def _to_datetime64(values):
+    try:
+        return np.asarray(values, dtype="datetime64[D]")
+    except (ValueError, TypeError):
+        # Mixed / dirty column: parse one by one, bad values become NaT
+        out = np.empty(len(values), dtype="datetime64[D]")
+        for i, value in enumerate(values):
+            try:
+                out[i] = np.datetime64(value, "D")
+            except (ValueError, TypeError):
+                out[i] = np.datetime64("NaT")
+        return out
+
+def ad_to_bs_many(values):
+    """
+    AD dates (ISO strings, datetime.date or datetime64) -> (years, months, days) int arrays.
+    Unparseable or out-of-range entries come back as 0.
+    """
+    table = get_table()
+    dates = _to_datetime64(values)
+    valid = ~np.isnat(dates)
+    offsets = np.where(valid, dates.astype(np.int64), 0) + (_EPOCH_ORDINAL - table.start_ordinal)
+    valid &= (offsets >= 0) & (offsets < len(table.day_to_bs))
+
+    packed = np.where(valid, table.day_to_bs[np.clip(offsets, 0, len(table.day_to_bs) - 1)], 0)
+    return packed // 10000, packed // 100 % 100, packed % 100
+
+def bs_to_ad_many(years, months, days):
+    """BS (years, months, days) arrays -> datetime64[D] array, NaT where invalid."""
+    table = get_table()
+    years, months, days = (np.asarray(a, dtype=np.int64) for a in (years, months, days))
+
+    index = (years - table.min_year) * 12 + (months - 1)
+    valid = (years >= table.min_year) & (years <= table.max_year) & (months >= 1) & (months <= 12)
+    index = np.where(valid, index, 0)
+    starts = table.month_starts[index]
+    lengths = table.month_starts[index + 1] - starts
+    valid &= (days >= 1) & (days <= lengths)
+
+    epoch_days = table.start_ordinal - _EPOCH_ORDINAL + starts + days - 1
+    out = epoch_days.astype("datetime64[D]")
+    out[~valid] = np.datetime64("NaT")
+    return out
+
+if __name__ == "__main__":
+    out_path = sys.argv[1] if len(sys.argv) > 1 else settings.BS_CALENDAR_TABLE_PATH
+    if not out_path:
+        sys.exit("usage: python -m app.utils.bs_calendar <output.npz>")
+    table = build_table()
+    save_table(table, out_path)
+    first, last = table.ad_range
+    print(f"Saved BS {table.min_year}-{table.max_year} (AD {first} to {last}) to {out_path}")
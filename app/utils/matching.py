@@ -0,0 +1,180 @@
+"""
+Approximate substring matching for name skeletons.
+
+`fuzzy_match_score` compares the user's short skeleton with the whole OCR
+skeleton, so unrelated text dilutes the score and SequenceMatcher is slow on
+long inputs. Here we look for the best-matching *window* of the corpus instead
+(semi-global edit distance), using Myers' bit-parallel algorithm: one pass over
+the corpus with a handful of integer ops per character, whatever the pattern length.
+"""
+from functools import lru_cache
+from itertools import repeat
+
+@lru_cache(maxsize=1024)
+def _pattern_masks(pattern):
+    """Peq table: for every character, a bitmask of the positions where it occurs."""
+    masks = {}
+    for i, ch in enumerate(pattern):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+def _myers_search(pattern, text):
+    """
+    Smallest edit distance between `pattern` and any substring of `text`.
+    Returns (distance, end) where text[:end] ends the best window (first one on ties).
+    """
+    m = len(pattern)
+    peq = _pattern_masks(pattern)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+
+    pv, mv = mask, 0
+    score = m
+    best, best_end = m, 0
+    j = 0
+    # Hot loop: the masks come from map() and the best can only improve when the score drops
+    for eq in map(peq.get, text, repeat(0)):
+        j += 1
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (mask ^ (xh | pv))   # Carry bit m (if any) is shifted out below
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+            if score < best:
+                best, best_end = score, j
+                if not best:
+                    break
+        # Search mode: no carry into bit 0, a match may start anywhere in the text
+        ph = (ph << 1) & mask
+        pv = ((mh << 1) & mask) | (mask ^ (xv | ph))
+        mv = ph & xv
+    return best, best_end
+
+def _window_start(pattern, text, end, distance):
+    """Start of the best window ending at `end` (same search on the reversed strings)."""
+    lo = max(0, end - len(pattern) - distance)
+    window = text[lo:end][::-1]
+    _, length = _myers_search(pattern[::-1], window)
+    return end - length
+
+def _qgrams(text, q):
+    return {text[i:i + q] for i in range(len(text) - q + 1)}
+
+def _pieces(pattern, k):
+    """Splits `pattern` into k+1 pieces: any window within distance k contains one of them exactly."""
+    count = k + 1
+    size, extra = divmod(len(pattern), count)
+    pieces, offset = [], 0
+    for i in range(count):
+        length = size + (1 if i < extra else 0)
+        pieces.append((offset, pattern[offset:offset + length]))
+        offset += length
+    return pieces
+
+class SkeletonMatcher:
+    """
+    Matches many short patterns (user entries) against one long corpus.
+    With a `min_score`, candidates are screened before any alignment runs:
+      1. q-gram lemma: a window within distance k shares at least
+         m - q + 1 - k*q of the pattern's q-grams with the corpus
+         (the corpus q-gram set is built once, on first use)
+      2. pigeonhole: split the pattern into k+1 pieces, one must occur exactly,
+         so only the windows around those occurrences (found with str.find) are aligned.
+    """
+
+    def __init__(self, corpus, q=2):
+        self.corpus = corpus
+        self.q = q
+        self._grams = None
+
+    def _could_reach(self, pattern, max_distance):
+        needed = len(pattern) - self.q + 1 - max_distance * self.q
+        if needed <= 0:
+            return True
+        if self._grams is None:
+            self._grams = _qgrams(self.corpus, self.q)
+        shared = sum(1 for i in range(len(pattern) - self.q + 1) if pattern[i:i + self.q] in self._grams)
+        return shared >= needed
+
+    def _candidate_windows(self, pattern, k):
+        m, n = len(pattern), len(self.corpus)
+        windows = []
+        for offset, piece in _pieces(pattern, k):
+            pos = self.corpus.find(piece)
+            while pos >= 0:
+                lo = max(0, pos - offset - k)
+                windows.append((lo, min(n, pos - offset + m + k)))
+                pos = self.corpus.find(piece, pos + 1)
+
+        # Merge overlapping windows so no character is aligned twice
+        merged = []
+        for lo, hi in sorted(windows):
+            if merged and lo <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], hi)
+            else:
+                merged.append([lo, hi])
+        return merged
+
+    def _screened_search(self, pattern, max_distance):
+        if not self._could_reach(pattern, max_distance):
+            return None
+        if max_distance >= len(pattern) // 2:
+            # Pieces would be 1-2 chars and match everywhere; a full pass is cheaper
+            return _myers_search(pattern, self.corpus)
+
+        best = None
+        for lo, hi in self._candidate_windows(pattern, max_distance):
+            distance, end = _myers_search(pattern, self.corpus[lo:hi])
+            if best is None or distance < best[0]:
+                best = (distance, lo + end)
+        return best
+
+    def _search(self, pattern, min_score):
+        """(distance, end) of the best window, None if screened out or empty."""
+        m = len(pattern)
+        if not m or not self.corpus:
+            return None
+
+        # Fast path: exact substring
+        start = self.corpus.find(pattern)
+        if start >= 0:
+            return 0, start + m
+
+        if min_score > 0:
+            max_distance = m * (100 - min_score) // 100
+            found = self._screened_search(pattern, max_distance)
+            if found is None or found[0] > max_distance:
+                return None
+            return found
+        return _myers_search(pattern, self.corpus)
+
+    def best_match(self, pattern, min_score=0):
+        """
+        Returns (score 0-100, start, end) of the best window for `pattern`.
+        With `min_score`, patterns that cannot reach it are screened out
+        and come back as (0, -1, -1).
+        """
+        found = self._search(pattern, min_score)
+        if found is None:
+            return 0, -1, -1
+        distance, end = found
+        m = len(pattern)
+        return 100 * (m - distance) // m, _window_start(pattern, self.corpus, end, distance), end
+
+    def score(self, pattern, min_score=0):
+        """Score only: one search, without locating the window's start."""
+        found = self._search(pattern, min_score)
+        if found is None:
+            return 0
+        m = len(pattern)
+        return 100 * (m - found[0]) // m
+
+    def match_many(self, patterns, min_score=0):
+        return [self.best_match(p, min_score) for p in patterns]
+
+def local_match_score(pattern, corpus, min_score=0):
+    """Score (0-100) of the best-matching window of `corpus` for `pattern`."""
+    return SkeletonMatcher(corpus).score(pattern, min_score)
@@ -1,5 +1,5 @@
-import nepali_datetime
 import datetime
+from app.utils.bs_calendar import ad_to_bs
 
 # Consonant Mapping (Moved from field_extractor)
 NEP_CONSONANT_MAP = {
@@ -14,10 +14,11 @@ NEP_CONSONANT_MAP = {
 
 ENG_TO_NEP = {'0':'०', '1':'१', '2':'२', '3':'३', '4':'४', '5':'५', '6':'६', '7':'७', '8':'८', '9':'९'}
 NEP_TO_ENG_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+ENG_TO_NEP_DIGITS = str.maketrans(ENG_TO_NEP)
 
 def translate_digits_to_nepali(text):
     if not text: return ""
-    return "".join(ENG_TO_NEP.get(char, char) for char in str(text))
+    return str(text).translate(ENG_TO_NEP_DIGITS)
 
 def normalize_to_eng_digits(text):
     """Converts Nepali digits to English digits."""
@@ -28,8 +29,7 @@ def ad_to_bs_nepali(ad_date_str):
     """Converts 2000-01-29 to २०५६-१०-१५"""
     try:
         y, m, d = map(int, ad_date_str.replace('/', '-').split('-'))
-        ad_date = datetime.date(y, m, d)
-        bs_date = nepali_datetime.date.from_datetime_date(ad_date)
-        return translate_digits_to_nepali(bs_date.strftime('%Y-%m-%d'))
+        y_bs, m_bs, d_bs = ad_to_bs(datetime.date(y, m, d))
+        return translate_digits_to_nepali(f"{y_bs:04d}-{m_bs:02d}-{d_bs:02d}")
     except:
         return None
\ No newline at end of file
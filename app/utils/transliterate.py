@@ -0,0 +1,66 @@
+"""
+Precompiled transliteration / normalization engine.
+
+Everything here runs for every OCR region of every request, so all patterns
+and tables are built once at import:
+  * Devanagari skeletons use longest-match tokenization. The token alternation
+    is ordered longest-first, so the compiled pattern behaves like a trie walk.
+    Conjuncts (क्ष, त्र, ज्ञ) are consumed before their first consonant, while
+    halant, matras, vowels and signs are never tokens and simply fall away.
+  * Keyword spacing is one combined pattern instead of one regex per keyword.
+"""
+import re
+import unicodedata
+from app.utils.nepali import NEP_CONSONANT_MAP
+
+# Nukta letters. The precomposed code points (U+0958-U+095F) are composition
+# exclusions: NFC/NFKC (normalize_unicode) turns them into base + nukta (U+093C),
+# while un-normalized OCR text may still carry them. Both spellings are tokens.
+_NEP_NUKTA_LETTERS = {
+    '\u0958': 'k', '\u0959': 'kh', '\u095a': 'g', '\u095b': 'j',
+    '\u095c': 'd', '\u095d': 'dh', '\u095e': 'f', '\u095f': 'y'
+}
+NEP_NUKTA_MAP = {
+    **_NEP_NUKTA_LETTERS,
+    **{unicodedata.normalize('NFD', letter): value for letter, value in _NEP_NUKTA_LETTERS.items()}
+}
+
+_NEP_TOKENS = {**NEP_CONSONANT_MAP, **NEP_NUKTA_MAP}
+_NEP_TOKEN_RE = re.compile("|".join(
+    re.escape(token) for token in sorted(_NEP_TOKENS, key=len, reverse=True)
+))
+_ENG_NON_CONSONANT_RE = re.compile(r'[^b-df-hj-np-tv-z]')
+
+SPACING_KEYWORDS = ["Year", "Month", "Day", "नाम", "थर", "जन्म", "मिति", "नं"]
+_LETTER_DIGIT_RE = re.compile(r'([a-zA-Z\u0900-\u097F])(\d)')
+_DIGIT_LETTER_RE = re.compile(r'(\d)([a-zA-Z\u0900-\u097F])')
+_KEYWORD_RE = re.compile("(" + "|".join(map(re.escape, SPACING_KEYWORDS)) + ")", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+_SEPARATOR_RE = re.compile(r'[:;|।!]')
+
+def consonant_skeleton(text, script="english"):
+    """'mnjl' from Manjil or मन्जिल."""
+    text = text.lower().strip()
+    if script == "nepali":
+        return "".join(map(_NEP_TOKENS.__getitem__, _NEP_TOKEN_RE.findall(text)))
+    # English: Keep consonants only
+    return _ENG_NON_CONSONANT_RE.sub("", text)
+
+def normalize_unicode(text):
+    if not text: return ""
+    text = unicodedata.normalize('NFKC', text)
+    # Printable text has no control/format chars, skip the per-character scan
+    if text.isprintable():
+        return text
+    return "".join(ch for ch in text if unicodedata.category(ch)[0] != 'C')
+
+def repair_spacing(text):
+    # Fix Year2000 -> Year 2000
+    text = _LETTER_DIGIT_RE.sub(r'\1 \2', text)
+    text = _DIGIT_LETTER_RE.sub(r'\1 \2', text)
+    # Fix standard keywords
+    text = _KEYWORD_RE.sub(r" \1 ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+def split_separators(text):
+    return _SEPARATOR_RE.sub(" : ", text)
@@ -0,0 +1,111 @@
+"""
+Decode benchmark: `prepare_image_full` (reference) vs `prepare_image_fast`.
+
+Generates large synthetic phone-style JPEGs (12/24/48 MP, some with an EXIF
+rotation tag) and measures, per path, the median decode latency and the peak
+RSS growth. Every (path, size) pair runs in a fresh process so peaks do not
+leak between measurements. Also reports the mean absolute pixel difference
+between the two outputs.
+
+    python -m benchmarks.bench_decode --sizes 12,24,48 --repeats 5
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+
+import numpy as np
+from PIL import Image
+
+def make_jpeg(megapixels, rotated, seed=0):
+    """Card-like content (flat background, dark text bars, sensor noise) at 4:3."""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    rng = np.random.default_rng(seed)
+
+    small = np.full((height // 8, width // 8, 3), 225, dtype=np.uint8)
+    for row in range(12, small.shape[0] - 12, max(8, small.shape[0] // 20)):
+        small[row:row + 3, 10:rng.integers(small.shape[1] // 3, small.shape[1] - 10)] = 40
+    image = Image.fromarray(small).resize((width, height), Image.Resampling.BILINEAR)
+    pixels = np.asarray(image).astype(np.int16) + rng.integers(-6, 7, (height, width, 1), dtype=np.int16)
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    exif = Image.Exif()
+    if rotated:
+        exif[0x0112] = 6  # Orientation: rotate 90 CW on display
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90, exif=exif.tobytes())
+    return buf.getvalue()
+
+def _measure(path_name, file_bytes, repeats, queue):
+    from app.utils import image as image_utils
+    fn = getattr(image_utils, f"prepare_image_{path_name}")
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        out = fn(file_bytes)
+        times.append((time.perf_counter() - started) * 1000)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    queue.put({
+        "median_ms": round(statistics.median(times), 1),
+        "peak_rss_delta_mb": round((peak - baseline) / 1024, 1),  # ru_maxrss is KiB on Linux
+        "output": out,
+    })
+
+def measure(path_name, file_bytes, repeats):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(path_name, file_bytes, repeats, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="12,24,48", help="Megapixels, comma separated")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = []
+    for mp in map(int, args.sizes.split(",")):
+        for rotated in (False, True):
+            file_bytes = make_jpeg(mp, rotated)
+            full = measure("full", file_bytes, args.repeats)
+            fast = measure("fast", file_bytes, args.repeats)
+
+            a, b = full.pop("output"), fast.pop("output")
+            diff = float(np.abs(a.astype(np.int16) - b.astype(np.int16)).mean()) if a.shape == b.shape else None
+            rows.append({
+                "megapixels": mp,
+                "rotated": rotated,
+                "upload_mb": round(len(file_bytes) / 1e6, 1),
+                "full": full,
+                "fast": fast,
+                "speedup": round(full["median_ms"] / max(fast["median_ms"], 1e-6), 2),
+                "shape_match": a.shape == b.shape,
+                "mean_abs_diff": None if diff is None else round(diff, 2),
+            })
+
+    print(f"{'MP':>4} {'rot':>4} {'full_ms':>8} {'fast_ms':>8} {'speedup':>8} {'full_MB':>8} {'fast_MB':>8} {'diff':>6}")
+    for r in rows:
+        print(f"{r['megapixels']:>4} {str(r['rotated'])[0]:>4} {r['full']['median_ms']:>8} {r['fast']['median_ms']:>8} "
+              f"{r['speedup']:>8} {r['full']['peak_rss_delta_mb']:>8} {r['fast']['peak_rss_delta_mb']:>8} {str(r['mean_abs_diff']):>6}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
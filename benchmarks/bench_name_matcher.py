@@ -0,0 +1,144 @@
+"""
+Name matcher benchmark: `fuzzy_match_score` (SequenceMatcher over the whole
+OCR skeleton) vs the local-alignment `SkeletonMatcher`, full and screened.
+
+Builds synthetic skeleton corpora of increasing length with the user's name
+planted in them (0-3 character edits) or absent, then reports:
+  * latency per call for both scorers, and for many entries vs one corpus
+  * MATCH (>80) / PARTIAL (>50) decisions against the ground truth
+  * agreement of the new distances with a plain O(m*n) dynamic programme
+
+    python -m benchmarks.bench_name_matcher --lengths 100,500,2000 --cases 200
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+
+from app.utils.matching import SkeletonMatcher, local_match_score, _myers_search
+from app.utils.text import fuzzy_match_score
+
+ALPHABET = "kghcjtdnpfbmyrls"
+
+def random_skeleton(rng, length):
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+def mutate(rng, text, edits):
+    chars = list(text)
+    for _ in range(edits):
+        op = rng.choice("sid")
+        pos = rng.randrange(len(chars))
+        if op == "s":
+            chars[pos] = rng.choice(ALPHABET)
+        elif op == "i":
+            chars.insert(pos, rng.choice(ALPHABET))
+        elif len(chars) > 1:
+            del chars[pos]
+    return "".join(chars)
+
+def reference_distance(pattern, text):
+    prev = [0] * (len(text) + 1)
+    for i, p in enumerate(pattern, 1):
+        cur = [i] + [0] * len(text)
+        for j, t in enumerate(text, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (p != t))
+        prev = cur
+    return min(prev)
+
+def make_cases(rng, length, count):
+    """(name, corpus, planted_edits or None for negatives)"""
+    cases = []
+    for i in range(count):
+        name = random_skeleton(rng, rng.randint(6, 14))
+        corpus = random_skeleton(rng, length)
+        if i % 2 == 0:
+            edits = rng.randint(0, 3)
+            planted = mutate(rng, name, edits)
+            pos = rng.randrange(max(1, length - len(planted)))
+            corpus = corpus[:pos] + planted + corpus[pos + len(planted):]
+            cases.append((name, corpus, edits))
+        else:
+            cases.append((name, corpus, None))
+    return cases
+
+def verify_name_score(name, corpus):
+    """What verify_name does: one search, score only."""
+    return SkeletonMatcher(corpus).score(name)
+
+def status(score):
+    return "MATCH" if score > 80 else "PARTIAL" if score > 50 else "MISMATCH"
+
+def evaluate(scorer, cases):
+    started = time.perf_counter()
+    scores = [scorer(name, corpus) for name, corpus, _ in cases]
+    elapsed = (time.perf_counter() - started) / len(cases) * 1000
+
+    # Expected: planted with <= 1 edit -> MATCH, not planted -> not MATCH
+    hits = sum(1 for s, (_, _, e) in zip(scores, cases) if e is not None and e <= 1 and status(s) == "MATCH")
+    positives = sum(1 for _, _, e in cases if e is not None and e <= 1)
+    false_matches = sum(1 for s, (_, _, e) in zip(scores, cases) if e is None and status(s) == "MATCH")
+    negatives = sum(1 for _, _, e in cases if e is None)
+    found = sum(1 for s, (_, _, e) in zip(scores, cases) if e is not None and status(s) != "MISMATCH")
+    planted = sum(1 for _, _, e in cases if e is not None)
+    return {
+        "ms_per_call": round(elapsed, 3),
+        "match_recall_le1_edit": round(hits / max(1, positives), 3),
+        "found_rate_any_edit": round(found / max(1, planted), 3),
+        "false_match_rate": round(false_matches / max(1, negatives), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", default="100,500,2000")
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--entries", type=int, default=500, help="User entries for the many-vs-one run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = []
+    for length in map(int, args.lengths.split(",")):
+        cases = make_cases(rng, length, args.cases)
+
+        # Correctness of the bit-parallel search on a sample
+        sample = cases[:20]
+        exact = all(_myers_search(n, c)[0] == reference_distance(n, c) for n, c, _ in sample)
+
+        # Many user entries against one corpus, with and without the q-gram screen
+        corpus = cases[0][1]
+        entries = [random_skeleton(rng, rng.randint(6, 14)) for _ in range(args.entries)]
+        matcher = SkeletonMatcher(corpus)
+        started = time.perf_counter()
+        matcher.match_many(entries)
+        plain_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        matcher.match_many(entries, min_score=80)
+        screened_ms = (time.perf_counter() - started) * 1000
+
+        rows.append({
+            "corpus_length": length,
+            "current": evaluate(fuzzy_match_score, cases),
+            "local": evaluate(local_match_score, cases),
+            "verify_name": evaluate(verify_name_score, cases),
+            "distances_match_reference": exact,
+            "many_vs_one_ms": round(plain_ms, 1),
+            "many_vs_one_screened_ms": round(screened_ms, 1),
+        })
+
+    for r in rows:
+        print(f"--- corpus length {r['corpus_length']} (distances exact: {r['distances_match_reference']})")
+        for name in ("current", "local", "verify_name"):
+            print(f"  {name:>11}: {r[name]}")
+        print(f"  {args.entries} entries vs one corpus: {r['many_vs_one_ms']} ms, screened (>=80): {r['many_vs_one_screened_ms']} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Per-stage pipeline benchmark on synthetic card fixtures (benchmarks/fixtures.py).
+
+Times every stage of a verification separately:
+  prepare_image, detect_regions, process_cards, run_ocr (one crop per call),
+  run_ocr_batch (what the service uses), process_robust_text,
+  generate_audit_report, create_verification_record
+and saves median / mean / p95 per stage as JSON. Stages whose dependencies are
+missing (ultralytics, paddle, model file) are reported as skipped; the text,
+audit and DB stages then run on the fixtures' ground-truth text instead of OCR
+output, so they stay comparable between runs.
+
+    python -m benchmarks.bench_stages --out runs/base.json
+    python -m benchmarks.bench_stages --out runs/new.json --baseline runs/base.json --threshold 10
+
+With --baseline, exits 1 when a stage's median is more than --threshold percent
+slower than in the baseline (and by more than --min-delta-ms, so sub-millisecond
+jitter on the cheap stages doesn't fail a run).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from collections import defaultdict
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+
+from app.core.config import settings
+from app.utils.image import prepare_image
+from app.utils.text import process_robust_text
+from app.services.auditor import generate_audit_report
+from benchmarks.fixtures import generate
+
+STAGES = (
+    "prepare_image", "detect_regions", "process_cards", "run_ocr", "run_ocr_batch",
+    "process_robust_text", "generate_audit_report", "create_verification_record",
+)
+ML_STAGES = ("detect_regions", "process_cards", "run_ocr", "run_ocr_batch")
+TRACKED_SETTINGS = ("FAST_DECODE", "MAX_IMAGE_DIMENSION", "YOLO_BACKEND", "YOLO_IMGSZ",
+                    "YOLO_CASCADE_ENABLED", "YOLO_COARSE_IMGSZ", "YOLO_FINE_IMGSZ", "OCR_MODE",
+                    "OCR_BATCH_SIZE", "OCR_WORKERS_NE", "OCR_WORKERS_EN", "DB_WRITE_MODE")
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.recording = False
+
+    def __call__(self, stage, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        if self.recording:
+            self.samples[stage].append((time.perf_counter() - started) * 1000)
+        return result
+
+def load_ml():
+    """The ML stages, or the reason they can't run here."""
+    try:
+        from app.ml.detection.yolo import detect_regions, process_cards
+        from app.ml.model_loader import preload_models
+        from app.ml.ocr.pipeline import run_ocr, run_ocr_batch
+        from app.services.verifier import build_ocr_targets
+        preload_models()
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    return {
+        "detect_regions": detect_regions,
+        "process_cards": process_cards,
+        "run_ocr": run_ocr,
+        "run_ocr_batch": run_ocr_batch,
+        "build_ocr_targets": build_ocr_targets,
+    }, None
+
+def ground_truth_ocr(fixture):
+    """OCR results as a perfect reader would return them (used when the ML stages are skipped)."""
+    results = []
+    for region in fixture.regions:
+        if "text" in region:
+            results.append({"face": fixture.layout, "text": region["text"], "engine": "fixture"})
+    return results
+
+def run_pipeline(fixture, ml, timer, db):
+    from app.db.repositories import create_verification_record
+
+    img = timer("prepare_image", prepare_image, fixture.image_bytes)
+
+    if ml:
+        detections = timer("detect_regions", ml["detect_regions"], img)
+        cards = timer("process_cards", ml["process_cards"], detections, img.shape)
+        targets = ml["build_ocr_targets"](img, cards)
+        for target in targets:
+            timer("run_ocr", ml["run_ocr"], target)
+        raw_results = timer("run_ocr_batch", ml["run_ocr_batch"], targets)
+        faces = [target["metadata"]["face"] for target in targets]
+    else:
+        raw_results = ground_truth_ocr(fixture)
+        faces = [result["face"] for result in raw_results]
+
+    ocr_results = []
+    for face, result in zip(faces, raw_results):
+        text = timer("process_robust_text", process_robust_text, result["text"])
+        ocr_results.append({
+            "face": face, "raw_text": result["text"], "text": text,
+            "engine": result["engine"], "conf_flag": result.get("confidence_flag", "unknown")
+        })
+
+    report, taxonomy = timer("generate_audit_report", generate_audit_report, ocr_results, fixture.user_data)
+    timer(
+        "create_verification_record", create_verification_record,
+        db=db, name=fixture.user_data["name"], id_number=fixture.user_data["id_number"],
+        dob=fixture.user_data["dob"], audit_report=report, taxonomy=taxonomy,
+        ocr_data=ocr_results, filename=fixture.name
+    )
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "min_ms": round(ordered[0], 4),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare(baseline, current, threshold, min_delta_ms):
+    """Prints a stage-by-stage table and returns the stages that regressed."""
+    regressed = []
+    print(f"\n{'stage':<28}{'base ms':>12}{'new ms':>12}{'delta':>10}")
+    for stage in STAGES:
+        base, new = baseline["stages"].get(stage, {}), current["stages"].get(stage, {})
+        if "median_ms" not in base or "median_ms" not in new:
+            print(f"{stage:<28}{'-':>12}{'-':>12}{'skipped':>10}")
+            continue
+        delta_ms = new["median_ms"] - base["median_ms"]
+        delta_pct = 100 * delta_ms / base["median_ms"] if base["median_ms"] else 0.0
+        flag = ""
+        if delta_pct > threshold and delta_ms > min_delta_ms:
+            regressed.append(stage)
+            flag = "  REGRESSION"
+        print(f"{stage:<28}{base['median_ms']:>12.3f}{new['median_ms']:>12.3f}{delta_pct:>+9.1f}%{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=12, help="Fixtures (cycles layouts x resolutions)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed passes over the fixtures first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", default=None, help="TTF with Devanagari glyphs (see benchmarks/fixtures.py)")
+    parser.add_argument("--no-ml", action="store_true", help="Skip YOLO / OCR even if available")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", default=None, help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed median slowdown (percent)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    import app.db.models  # noqa: F401  (registers the tables)
+    from app.db.session import Base, SessionLocal, engine
+    Base.metadata.create_all(bind=engine)
+
+    fixtures = generate(args.count, seed=args.seed, font=args.font)
+    ml, ml_skipped = (None, "--no-ml") if args.no_ml else load_ml()
+    if ml_skipped:
+        print(f"ML stages skipped ({ml_skipped}); text/audit/DB stages use ground-truth text.")
+
+    timer = StageTimer()
+    db = SessionLocal()
+    try:
+        for rep in range(args.warmup + args.repeats):
+            timer.recording = rep >= args.warmup
+            for fixture in fixtures:
+                run_pipeline(fixture, ml, timer, db)
+    finally:
+        db.close()
+
+    stages = {}
+    for stage in STAGES:
+        if timer.samples.get(stage):
+            stages[stage] = summarize(timer.samples[stage])
+        else:
+            stages[stage] = {"skipped": ml_skipped if stage in ML_STAGES else "no samples"}
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "fixtures": len(fixtures),
+            "repeats": args.repeats,
+            "ml": ml is not None,
+            "settings": {name: getattr(settings, name) for name in TRACKED_SETTINGS},
+        },
+        "stages": stages,
+    }
+
+    print(f"\n{'stage':<28}{'n':>6}{'median ms':>12}{'p95 ms':>12}")
+    for stage, s in stages.items():
+        if "median_ms" in s:
+            print(f"{stage:<28}{s['n']:>6}{s['median_ms']:>12.3f}{s['p95_ms']:>12.3f}")
+        else:
+            print(f"{stage:<28}{'':>6}{'skipped':>12}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("settings") != result["meta"]["settings"]:
+            print("Note: baseline was recorded with different settings.")
+        regressed = compare(baseline, result, args.threshold, args.min_delta_ms)
+        if regressed:
+            print(f"\nFAIL: {', '.join(regressed)} slower than baseline by more than {args.threshold}%")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
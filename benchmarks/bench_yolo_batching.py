@@ -0,0 +1,109 @@
+"""
+YOLO micro-batching benchmark.
+
+Sweeps YOLO_MAX_BATCH x YOLO_MAX_WAIT_MS with N concurrent callers and reports
+throughput, latency percentiles and the batch sizes that actually formed,
+next to the unbatched baseline.
+
+    python -m benchmarks.bench_yolo_batching --images test_dataset/ --concurrency 8
+"""
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+
+import numpy as np
+
+from app.core.config import settings
+from app.ml.detection import yolo
+from app.services.verifier import prepare_image
+
+def load_images(path, count):
+    files = sorted(glob.glob(os.path.join(path, "*"))) if path else []
+    images = []
+    for f in files[:count]:
+        with open(f, "rb") as fh:
+            images.append(prepare_image(fh.read()))
+    if not images:
+        # No dataset given: random card-sized images still exercise the full forward pass
+        rng = np.random.default_rng(0)
+        images = [rng.integers(0, 255, (1200, 1800, 3), dtype=np.uint8) for _ in range(count)]
+    return images
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def run_config(images, concurrency, calls, max_batch=None, max_wait_ms=None):
+    if max_batch is None:
+        settings.YOLO_MICROBATCH_ENABLED = False
+    else:
+        settings.YOLO_MICROBATCH_ENABLED = True
+        yolo._BATCHER = yolo.MicroBatcher(max_batch, max_wait_ms)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def caller(offset):
+        for i in range(calls):
+            image = images[(offset + i) % len(images)]
+            started = time.perf_counter()
+            yolo.detect_regions(image)
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=caller, args=(t,)) for t in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - started
+
+    row = {
+        "max_batch": max_batch,
+        "max_wait_ms": max_wait_ms,
+        "throughput_ips": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+    if max_batch is not None:
+        stats = yolo._BATCHER.stats()
+        row["avg_batch_size"] = stats["avg_batch_size"]
+        row["avg_queue_wait_ms"] = stats["avg_queue_wait_ms"]
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="Directory of card images (default: random images)")
+    parser.add_argument("--num-images", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=8, help="Calls per concurrent caller")
+    parser.add_argument("--batches", default="2,4,8")
+    parser.add_argument("--waits", default="5,10,25")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.num_images)
+    yolo.get_model()
+    yolo.detect_regions(images[0])  # Warm-up
+
+    rows = [run_config(images, args.concurrency, args.calls)]
+    for b in map(int, args.batches.split(",")):
+        for w in map(float, args.waits.split(",")):
+            rows.append(run_config(images, args.concurrency, args.calls, b, w))
+
+    print(f"{'batch':>6} {'wait_ms':>8} {'img/s':>8} {'p50_ms':>8} {'p99_ms':>8} {'avg_bs':>7} {'q_wait':>7}")
+    for r in rows:
+        print(f"{str(r['max_batch'] or '-'):>6} {str(r['max_wait_ms'] or '-'):>8} {r['throughput_ips']:>8} "
+              f"{r['p50_ms']:>8} {r['p99_ms']:>8} {str(r.get('avg_batch_size', '-')):>7} {str(r.get('avg_queue_wait_ms', '-')):>7}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
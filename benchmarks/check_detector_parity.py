@@ -0,0 +1,121 @@
+"""
+Detector backend parity check.
+
+Runs the PyTorch model and an exported backend (onnx / openvino) on the same
+images and compares detect_regions output (labels, conf, bbox) and the
+process_cards grouping built on top of it. Also reports per-image latency.
+Exits non-zero on any mismatch, so it can gate a model/backend rollout.
+
+    python -m benchmarks.check_detector_parity --backend onnx --images test_dataset/
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+
+import numpy as np
+from ultralytics import YOLO
+
+from app.core.config import settings
+from app.ml.detection import yolo
+from app.ml.detection.backends import EXPORT_FORMATS, default_imgsz, resolve_model_path
+from app.utils.image import prepare_image
+
+def load_images(path, count):
+    files = sorted(glob.glob(os.path.join(path, "*")))[:count] if path else []
+    images = []
+    for f in files:
+        with open(f, "rb") as fh:
+            images.append((os.path.basename(f), prepare_image(fh.read())))
+    if not images:
+        # No dataset given: random images only check that both backends agree on noise
+        rng = np.random.default_rng(0)
+        images = [(f"random_{i}", rng.integers(0, 255, (1200, 1800, 3), dtype=np.uint8)) for i in range(count)]
+    return images
+
+def detect(model, image, conf):
+    results = model.predict(source=image, conf=conf, imgsz=default_imgsz(), verbose=False)
+    return yolo._parse_result(results[0], image, model.names) if results else []
+
+def iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+def compare(reference, candidate, box_tol, conf_tol):
+    """Pairs detections by label + best IoU. Returns (problems, max bbox delta, max conf delta)."""
+    problems, box_delta, conf_delta = [], 0, 0.0
+    unmatched = list(candidate)
+    for ref in reference:
+        options = [c for c in unmatched if c["label"] == ref["label"]]
+        if not options:
+            problems.append(f"missing {ref['label']} {ref['bbox']}")
+            continue
+        best = max(options, key=lambda c: iou(ref["bbox"], c["bbox"]))
+        unmatched.remove(best)
+
+        d_box = max(abs(p - q) for p, q in zip(ref["bbox"], best["bbox"]))
+        d_conf = abs(ref["conf"] - best["conf"])
+        box_delta, conf_delta = max(box_delta, d_box), max(conf_delta, d_conf)
+        if d_box > box_tol or d_conf > conf_tol:
+            problems.append(f"{ref['label']}: bbox {ref['bbox']} vs {best['bbox']}, conf {ref['conf']:.3f} vs {best['conf']:.3f}")
+    for extra in unmatched:
+        problems.append(f"extra {extra['label']} {extra['bbox']}")
+    return problems, box_delta, conf_delta
+
+def card_summary(detections, shape):
+    return [(card["face"], sorted(card["presence_map"])) for card in yolo.process_cards(detections, shape)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=list(EXPORT_FORMATS), default="onnx")
+    parser.add_argument("--images", default=None, help="Folder of card images (random images if omitted)")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--conf", type=float, default=0.3)
+    parser.add_argument("--box-tol", type=int, default=2, help="Max bbox coordinate difference (px)")
+    parser.add_argument("--conf-tol", type=float, default=0.02)
+    args = parser.parse_args()
+
+    reference_model = YOLO(settings.YOLO_MODEL_PATH, task="detect")
+    candidate_model = YOLO(resolve_model_path(args.backend), task="detect")
+    images = load_images(args.images, args.count)
+
+    # Warm both up so the timings below are steady-state
+    for model in (reference_model, candidate_model):
+        detect(model, images[0][1], args.conf)
+
+    failures, box_delta, conf_delta = 0, 0, 0.0
+    timings = {"torch": [], args.backend: []}
+    for name, image in images:
+        t0 = time.perf_counter()
+        reference = detect(reference_model, image, args.conf)
+        t1 = time.perf_counter()
+        candidate = detect(candidate_model, image, args.conf)
+        t2 = time.perf_counter()
+        timings["torch"].append((t1 - t0) * 1000)
+        timings[args.backend].append((t2 - t1) * 1000)
+
+        problems, d_box, d_conf = compare(reference, candidate, args.box_tol, args.conf_tol)
+        box_delta, conf_delta = max(box_delta, d_box), max(conf_delta, d_conf)
+        if card_summary(reference, image.shape) != card_summary(candidate, image.shape):
+            problems.append("process_cards grouping differs")
+        if problems:
+            failures += 1
+            print(f"MISMATCH {name}:")
+            for problem in problems:
+                print(f"    {problem}")
+
+    for backend, values in timings.items():
+        print(f"{backend:>9}: {np.mean(values):7.1f} ms/image (p95 {np.percentile(values, 95):.1f})")
+    print(f"max bbox delta {box_delta}px, max conf delta {conf_delta:.4f}")
+    print(f"{len(images) - failures}/{len(images)} images match")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
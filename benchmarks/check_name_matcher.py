@@ -0,0 +1,68 @@
+"""
+Name matcher accuracy check.
+
+Asserts that the scorer verify_name uses (`SkeletonMatcher.score`) is never
+worse than the old whole-corpus `fuzzy_match_score`:
+  * its distances equal a plain O(m*n) dynamic programme
+  * names on the card score at least as high as before, and a MATCH stays a MATCH
+  * names not on the card are not turned into a MATCH
+on synthetic skeleton corpora (benchmarks/bench_name_matcher.py) and on a few
+card texts run through verify_name itself. Fails with an AssertionError, so
+it can gate a matcher change.
+
+The synthetic corpora stop at 500 characters; a card's skeleton is shorter.
+Much longer random text contains short names within one edit by chance.
+
+    python -m benchmarks.check_name_matcher
+"""
+import os
+import random
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+
+from app.services.auditor import verify_name
+from app.utils.matching import _myers_search
+from app.utils.text import fuzzy_match_score, get_consonant_skeleton
+from benchmarks.bench_name_matcher import make_cases, reference_distance, status, verify_name_score
+
+CARD = (
+    "नेपाल सरकार राष्ट्रिय परिचयपत्र नाम थर: राम बहादुर थापा लिङ्ग: पुरुष "
+    "जन्म मिति: २०४५-०३-१२ जारी मिति: २०७८-०१-०५"
+)
+# (name entered by the user, expected status)
+CARD_CASES = [
+    ("Ram Bahadur Thapa", "MATCH"),
+    ("Ram Bahadur Tapa", "MATCH"),
+    ("Hari Prasad Sharma", "MISMATCH"),
+]
+
+def check_synthetic(seed=0, lengths=(100, 500), count=200):
+    rng = random.Random(seed)
+    for length in lengths:
+        cases = make_cases(rng, length, count)
+        for name, corpus, edits in cases:
+            new, old = verify_name_score(name, corpus), fuzzy_match_score(name, corpus)
+            if edits is not None:
+                assert new >= old, f"planted name scored lower: {new} < {old} ({name!r}, {edits} edits, length {length})"
+            else:
+                assert status(new) != "MATCH" or status(old) == "MATCH", \
+                    f"absent name became a MATCH: {new} ({name!r}, length {length})"
+        for name, corpus, _ in cases[:20]:
+            assert _myers_search(name, corpus)[0] == reference_distance(name, corpus), f"distance differs for {name!r}"
+        print(f"corpus length {length}: {len(cases)} cases ok")
+
+def check_cards():
+    ocr_skeleton = get_consonant_skeleton(CARD, "nepali")
+    for name, expected in CARD_CASES:
+        result = verify_name(name, CARD, "")
+        old = fuzzy_match_score(get_consonant_skeleton(name, "english"), ocr_skeleton)
+        assert result["status"] == expected, f"{name!r}: {result['status']} (expected {expected})"
+        if expected == "MATCH":
+            assert result["score"] >= old, f"{name!r}: {result['score']} < old {old}"
+        print(f"{name}: {result['status']} {result['score']} (old scorer {old})")
+
+if __name__ == "__main__":
+    check_synthetic()
+    check_cards()
+    print("Name matcher check passed.")
@@ -0,0 +1,207 @@
+"""
+FP32 vs INT8 evaluation: verification accuracy, latency and memory.
+
+Runs every variant through process_verification on a labeled set (a folder of
+card images plus manifest.csv / manifest.json with filename,name,id_number,dob)
+and reports per variant:
+  * MATCH rate per audited field (from generate_audit_report) and for all fields together
+  * latency mean / p95 per card
+  * peak and final RSS
+  * share of text regions left un-OCRed (AUDIT_EARLY_EXIT)
+Each variant runs in its own subprocess, so models and RSS never mix. The first
+variant is the baseline; cards it matches but another variant doesn't are listed.
+
+    python -m benchmarks.eval_quantization --data labeled_cards/ \
+        --variant fp32:YOLO_BACKEND=onnx \
+        --variant int8:YOLO_BACKEND=onnx_int8,OCR_REC_MODEL_DIR_NE=models/rec_ne_int8
+
+The same harness checks the early-exit audit (OCR saved vs. accuracy):
+
+    python -m benchmarks.eval_quantization --data labeled_cards/ \
+        --variant full:AUDIT_EARLY_EXIT=false --variant early:AUDIT_EARLY_EXIT=true
+
+Exits non-zero if a variant's MATCH rate on any field drops more than --max-drop
+percentage points below the baseline.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+FIELDS = ("name", "id_number", "dob")
+DEFAULT_VARIANTS = ["fp32:YOLO_BACKEND=torch", "int8:YOLO_BACKEND=onnx_int8"]
+
+def load_manifest(data_dir):
+    from app.services.batch import parse_manifest
+
+    for name in ("manifest.csv", "manifest.json"):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return parse_manifest(f.read(), name)
+    raise SystemExit(f"No manifest.csv / manifest.json in {data_dir}")
+
+def current_rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+# --- Worker (one variant, in its own process) ---
+
+def run_worker(data_dir, limit, out_path):
+    import app.db.models  # noqa: F401  (registers the tables)
+    from app.db.session import Base, SessionLocal, engine
+    from app.ml.model_loader import preload_models, preload_status
+    from app.services.verifier import process_verification
+
+    Base.metadata.create_all(bind=engine)
+    preload_models()
+    manifest = sorted(load_manifest(data_dir).items())[:limit or None]
+
+    db = SessionLocal()
+    items = []
+    for filename, user_data in manifest:
+        with open(os.path.join(data_dir, filename), "rb") as f:
+            file_bytes = f.read()
+        started = time.perf_counter()
+        regions = skipped = 0
+        try:
+            result = process_verification(file_bytes, user_data, db, filename=filename)
+            statuses = {field: result["report"][field]["status"] for field in FIELDS}
+            skipped = len(result["skipped_regions"])
+            regions = len(result["ocr_details"]) + skipped
+            error = None
+        except Exception as e:
+            statuses, error = {field: "ERROR" for field in FIELDS}, str(e)
+        items.append({
+            "filename": filename,
+            "ms": (time.perf_counter() - started) * 1000,
+            "status": statuses,
+            "regions": regions,
+            "skipped": skipped,
+            "error": error
+        })
+    db.close()
+
+    with open(out_path, "w") as f:
+        json.dump({
+            "items": items,
+            "preload": preload_status(),
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "final_rss_mb": current_rss_mb()
+        }, f)
+
+# --- Driver ---
+
+def parse_variant(spec):
+    name, _, overrides = spec.partition(":")
+    env = dict(pair.split("=", 1) for pair in overrides.split(",") if pair)
+    return name, env
+
+def run_variant(name, overrides, args, workdir):
+    out_path = os.path.join(workdir, f"{name}.json")
+    env = dict(os.environ)
+    env.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+    env.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, name + '.db')}",
+        "RESULT_CACHE_ENABLED": "False",   # Every card must really run through the models
+        "DB_WRITE_MODE": "sync",
+    })
+    env.update(overrides)
+
+    print(f"[{name}] {overrides or '(defaults)'}", flush=True)
+    cmd = [sys.executable, "-m", "benchmarks.eval_quantization", "--worker",
+           "--data", args.data, "--limit", str(args.limit), "--out", out_path]
+    subprocess.run(cmd, env=env, check=True, stdout=None if args.verbose else subprocess.DEVNULL)
+    with open(out_path) as f:
+        return json.load(f)
+
+def summarize(run):
+    items = run["items"]
+    count = max(1, len(items))
+    latencies = sorted(item["ms"] for item in items)
+    rates = {field: 100 * sum(item["status"][field] == "MATCH" for item in items) / count for field in FIELDS}
+    rates["all"] = 100 * sum(all(item["status"][f] == "MATCH" for f in FIELDS) for item in items) / count
+    regions = sum(item.get("regions", 0) for item in items)
+    return {
+        "cards": len(items),
+        "errors": sum(1 for item in items if item["error"]),
+        "match_rate": rates,
+        "mean_ms": sum(latencies) / count,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+        "skipped_pct": 100 * sum(item.get("skipped", 0) for item in items) / max(1, regions),
+        "peak_rss_mb": run["peak_rss_mb"],
+        "final_rss_mb": run["final_rss_mb"],
+        "preload_ms": run["preload"].get("total_ms"),
+    }
+
+def regressions(baseline, candidate):
+    """Cards/fields the baseline matched but the candidate didn't."""
+    base = {item["filename"]: item["status"] for item in baseline["items"]}
+    lost = []
+    for item in candidate["items"]:
+        for field in FIELDS:
+            if base.get(item["filename"], {}).get(field) == "MATCH" and item["status"][field] != "MATCH":
+                lost.append(f"{item['filename']}:{field} ({item['status'][field]})")
+    return lost
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", required=True, help="Folder with card images + manifest.csv/json")
+    parser.add_argument("--variant", action="append", help="name:KEY=VAL,KEY=VAL (settings overrides); first is the baseline")
+    parser.add_argument("--limit", type=int, default=0, help="Only the first N cards (0 = all)")
+    parser.add_argument("--max-drop", type=float, default=1.0, help="Allowed MATCH-rate drop per field (points)")
+    parser.add_argument("--json", default=None, help="Also write the summary here")
+    parser.add_argument("--verbose", action="store_true", help="Show the workers' own output")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.data, args.limit, args.out)
+        return
+
+    variants = [parse_variant(spec) for spec in (args.variant or DEFAULT_VARIANTS)]
+    with tempfile.TemporaryDirectory(prefix="eval_quant_") as workdir:
+        runs = {name: run_variant(name, overrides, args, workdir) for name, overrides in variants}
+
+    summaries = {name: summarize(run) for name, run in runs.items()}
+    baseline_name = variants[0][0]
+    baseline = summaries[baseline_name]
+
+    header = f"{'variant':<10}" + "".join(f"{f:>11}" for f in FIELDS + ("all",)) + f"{'mean ms':>10}{'p95 ms':>10}{'peak MB':>10}{'final MB':>10}{'skipped':>10}"
+    print("\n" + header)
+    print("-" * len(header))
+    failed = False
+    for name, s in summaries.items():
+        row = f"{name:<10}" + "".join(f"{s['match_rate'][f]:>10.1f}%" for f in FIELDS + ("all",))
+        row += f"{s['mean_ms']:>10.0f}{s['p95_ms']:>10.0f}{s['peak_rss_mb']:>10.0f}{s['final_rss_mb']:>10.0f}{s['skipped_pct']:>9.1f}%"
+        print(row)
+        if name != baseline_name:
+            drops = {f: baseline["match_rate"][f] - s["match_rate"][f] for f in FIELDS}
+            if any(drop > args.max_drop for drop in drops.values()):
+                failed = True
+    print(f"\n{baseline['cards']} cards, baseline = {baseline_name}")
+
+    for name in list(runs)[1:]:
+        lost = regressions(runs[baseline_name], runs[name])
+        print(f"{name}: {len(lost)} field(s) lost vs {baseline_name}")
+        for entry in lost[:20]:
+            print(f"    {entry}")
+        summaries[name]["lost_vs_baseline"] = lost
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+    if failed:
+        print(f"FAIL: a MATCH rate dropped more than {args.max_drop} points")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Synthetic citizenship-card fixtures for the benchmarks.
+
+Renders front (Devanagari text + photo blob) and back (English text +
+fingerprint blob) cards, single or stacked into one composite image, at several
+resolutions. Every fixture carries the user entry it should verify against and
+the ground-truth region boxes, labelled like the YOLO classes.
+
+Devanagari needs a font with Devanagari glyphs (Noto Sans Devanagari, Lohit,
+Mangal...). One is searched in the usual places, or pass --font / FIXTURE_FONT.
+Without one the text still renders (as boxes): fine for timing, not for accuracy.
+
+    python -m benchmarks.fixtures out_dir/ --count 20   # writes JPEGs + manifest.csv
+"""
+import argparse
+import csv
+import datetime
+import glob
+import io
+import os
+import random
+from dataclasses import dataclass, field
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from app.utils.bs_calendar import ad_to_bs
+from app.utils.nepali import ENG_TO_NEP_DIGITS
+
+LAYOUTS = ("front", "back", "composite")
+RESOLUTIONS = ((1000, 640), (1600, 1024), (2400, 1536))   # Card (width, height) before composite stacking
+
+FONT_SEARCH = (
+    "/usr/share/fonts/**/NotoSansDevanagari*.ttf",
+    "/usr/share/fonts/**/Lohit-Devanagari*.ttf",
+    "/usr/share/fonts/**/*Devanagari*.tt[fc]",
+    "/Library/Fonts/**/*Devanagari*.tt[fc]",
+    "/System/Library/Fonts/**/*Devanagari*.tt[fc]",
+    "C:/Windows/Fonts/mangal.ttf",
+)
+
+# (english, devanagari)
+GIVEN_NAMES = [("Ram", "राम"), ("Sita", "सीता"), ("Hari", "हरि"), ("Gita", "गीता"), ("Krishna", "कृष्ण"),
+               ("Maya", "माया"), ("Bishnu", "विष्णु"), ("Sunita", "सुनिता"), ("Manjil", "मन्जिल"), ("Anita", "अनिता")]
+MIDDLE_NAMES = [("Bahadur", "बहादुर"), ("Kumari", "कुमारी"), ("Prasad", "प्रसाद"), ("", "")]
+SURNAMES = [("Thapa", "थापा"), ("Shrestha", "श्रेष्ठ"), ("Gurung", "गुरुङ"), ("Budhathoki", "बुढाथोकी"),
+            ("Tamang", "तामाङ"), ("Karki", "कार्की"), ("Adhikari", "अधिकारी"), ("Rai", "राई")]
+DISTRICTS = [("Kathmandu", "काठमाडौं"), ("Kaski", "कास्की"), ("Jhapa", "झापा"), ("Dang", "दाङ")]
+
+@dataclass
+class Fixture:
+    name: str                   # File-safe id
+    layout: str                 # front | back | composite
+    image_bytes: bytes          # JPEG, as a client would upload it
+    size: tuple                 # (width, height)
+    user_data: dict             # name / id_number / dob (AD) to verify against
+    regions: list = field(default_factory=list)   # Ground truth: {"label", "bbox"} (+ "text" on text blocks)
+
+def find_font(path=None):
+    path = path or os.environ.get("FIXTURE_FONT")
+    if path:
+        return path
+    for pattern in FONT_SEARCH:
+        found = sorted(glob.glob(pattern, recursive=True))
+        if found:
+            return found[0]
+    return None
+
+class _Fonts:
+    def __init__(self, path):
+        self.path = path
+        self._cache = {}
+        if path is None:
+            print("fixtures: no Devanagari font found, text renders as boxes (timing only). Use --font / FIXTURE_FONT.")
+
+    def get(self, size):
+        if size not in self._cache:
+            self._cache[size] = ImageFont.truetype(self.path, size) if self.path else ImageFont.load_default(size)
+        return self._cache[size]
+
+def _person(rng):
+    given, middle, surname = rng.choice(GIVEN_NAMES), rng.choice(MIDDLE_NAMES), rng.choice(SURNAMES)
+    parts = [p for p in (given, middle, surname) if p[0]]
+    dob = datetime.date(1960, 1, 1) + datetime.timedelta(days=rng.randrange(0, 45 * 365))
+    id_number = f"{rng.randint(10, 77)}-{rng.randint(1, 9):02d}-{rng.randint(60, 80)}-{rng.randint(10000, 99999)}"
+    return {
+        "name_en": " ".join(p[0] for p in parts),
+        "name_ne": " ".join(p[1] for p in parts),
+        "id_number": id_number,
+        "dob": dob,
+        "dob_bs": "{:04d}-{:02d}-{:02d}".format(*ad_to_bs(dob)),
+        "district": rng.choice(DISTRICTS),
+    }
+
+def _text_block(draw, fonts, lines, x, y, size, regions):
+    """Draws lines of text and records one text_block_primary box per line."""
+    font = fonts.get(size)
+    for line in lines:
+        left, top, right, bottom = draw.textbbox((x, y), line, font=font)
+        draw.text((x, y), line, font=font, fill=(25, 25, 35))
+        regions.append({"label": "text_block_primary", "bbox": [left - 4, top - 4, right + 4, bottom + 4], "text": line})
+        y += int(size * 1.6)
+
+def _photo(card, rng, box, regions):
+    """Face-like blob: shaded ellipse head + shoulders on a tinted background."""
+    x1, y1, x2, y2 = box
+    w, h = x2 - x1, y2 - y1
+    patch = Image.new("RGB", (w, h), rng.choice([(170, 190, 215), (200, 205, 210), (215, 200, 180)]))
+    draw = ImageDraw.Draw(patch)
+    draw.ellipse((w * 0.28, h * 0.12, w * 0.72, h * 0.62), fill=(190, 150, 120))
+    draw.ellipse((w * 0.08, h * 0.68, w * 0.92, h * 1.3), fill=(50, 55, 70))
+    card.paste(patch, (x1, y1))
+    regions.append({"label": "photo_region", "bbox": list(box)})
+
+def _fingerprint(card, rng, box, regions):
+    """Concentric ridges (ellipses with jitter), blurred a little like an ink print."""
+    x1, y1, x2, y2 = box
+    patch = Image.new("RGB", (x2 - x1, y2 - y1), (245, 245, 240))
+    draw = ImageDraw.Draw(patch)
+    cx, cy = patch.width / 2 + rng.uniform(-5, 5), patch.height / 2 + rng.uniform(-5, 5)
+    step = max(3, patch.width // 30)
+    for r in range(step, max(patch.size), step):
+        draw.ellipse((cx - r * 0.8, cy - r, cx + r * 0.8, cy + r), outline=(60, 60, 90), width=max(1, step // 3))
+    card.paste(patch.filter(ImageFilter.GaussianBlur(0.8)), (x1, y1))
+    regions.append({"label": "fingerprint_region", "bbox": list(box)})
+
+def _card(face, person, size, fonts, rng):
+    w, h = size
+    card = Image.new("RGB", size, (236, 232, 222))
+    draw = ImageDraw.Draw(card)
+    draw.rectangle((0, 0, w - 1, int(h * 0.13)), fill=(165, 40, 45))
+    regions = [{"label": "Id_card_boundary", "bbox": [0, 0, w, h]}]
+    text_size = max(12, h // 22)
+
+    if face == "front":
+        _photo(card, rng, (int(w * 0.05), int(h * 0.22), int(w * 0.27), int(h * 0.62)), regions)
+        digits = lambda s: s.translate(ENG_TO_NEP_DIGITS)
+        lines = [
+            "नेपाल सरकार  नागरिकता प्रमाणपत्र",
+            f"ना.प्र.नं.: {digits(person['id_number'])}",
+            f"नाम थर: {person['name_ne']}",
+            f"जन्म स्थान: {person['district'][1]}",
+            f"जन्म मिति: साल {digits(person['dob_bs'][:4])} महिना {digits(person['dob_bs'][5:7])} गते {digits(person['dob_bs'][8:])}",
+        ]
+        _text_block(draw, fonts, lines, int(w * 0.31), int(h * 0.2), text_size, regions)
+    else:
+        _fingerprint(card, rng, (int(w * 0.06), int(h * 0.55), int(w * 0.24), int(h * 0.92)), regions)
+        _fingerprint(card, rng, (int(w * 0.28), int(h * 0.55), int(w * 0.46), int(h * 0.92)), regions)
+        dob = person["dob"]
+        lines = [
+            "GOVERNMENT OF NEPAL  CITIZENSHIP CERTIFICATE",
+            f"Citizenship Certificate No.: {person['id_number']}",
+            f"Full Name: {person['name_en'].upper()}",
+            f"Date of Birth (AD): Year {dob.year} Month {dob.strftime('%b').upper()} Day {dob.day:02d}",
+            f"District: {person['district'][0]}",
+        ]
+        _text_block(draw, fonts, lines, int(w * 0.05), int(h * 0.17), int(text_size * 0.85), regions)
+    return card, regions
+
+def _offset(regions, dy):
+    return [{**r, "bbox": [r["bbox"][0], r["bbox"][1] + dy, r["bbox"][2], r["bbox"][3] + dy]} for r in regions]
+
+def make_fixture(index, layout, size, fonts, seed=0, quality=90):
+    rng = random.Random(seed * 100003 + index)
+    person = _person(rng)
+
+    if layout == "composite":
+        front, front_regions = _card("front", person, size, fonts, rng)
+        back, back_regions = _card("back", person, size, fonts, rng)
+        gap = size[1] // 10
+        image = Image.new("RGB", (size[0], size[1] * 2 + gap), (250, 250, 250))
+        image.paste(front, (0, 0))
+        image.paste(back, (0, size[1] + gap))
+        regions = front_regions + _offset(back_regions, size[1] + gap)
+    else:
+        image, regions = _card(layout, person, size, fonts, rng)
+
+    # A little camera noise so JPEG sizes and decode cost look like real uploads
+    pixels = np.asarray(image).astype(np.int16)
+    noise = np.random.default_rng(seed * 100003 + index).integers(-5, 6, pixels.shape[:2] + (1,), dtype=np.int16)
+    image = Image.fromarray(np.clip(pixels + noise, 0, 255).astype(np.uint8))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return Fixture(
+        name=f"{index:03d}_{layout}_{size[0]}x{size[1]}",
+        layout=layout,
+        image_bytes=buffer.getvalue(),
+        size=image.size,
+        user_data={"name": person["name_en"], "id_number": person["id_number"], "dob": person["dob"].isoformat()},
+        regions=regions,
+    )
+
+def generate(count=12, layouts=LAYOUTS, resolutions=RESOLUTIONS, seed=0, font=None):
+    """`count` fixtures cycling through every layout x resolution combination."""
+    fonts = _Fonts(find_font(font))
+    combos = [(layout, size) for size in resolutions for layout in layouts]
+    return [make_fixture(i, *combos[i % len(combos)], fonts, seed=seed) for i in range(count)]
+
+def write_fixtures(fixtures, out_dir):
+    """JPEGs + manifest.csv (the /verify/batch and eval_quantization format)."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "manifest.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["filename", "name", "id_number", "dob"])
+        for fixture in fixtures:
+            filename = fixture.name + ".jpg"
+            with open(os.path.join(out_dir, filename), "wb") as img:
+                img.write(fixture.image_bytes)
+            writer.writerow([filename, fixture.user_data["name"], fixture.user_data["id_number"], fixture.user_data["dob"]])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", default=None, help="TTF with Devanagari glyphs")
+    args = parser.parse_args()
+
+    fixtures = generate(args.count, seed=args.seed, font=args.font)
+    write_fixtures(fixtures, args.out_dir)
+    print(f"Wrote {len(fixtures)} fixtures to {args.out_dir}")
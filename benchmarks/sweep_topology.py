@@ -0,0 +1,171 @@
+"""
+Worker x thread sweep on this machine: throughput and tail latency per combination.
+
+For every (workers, threads) pair, starts `workers` processes with
+WEB_CONCURRENCY=workers and WORKER_CPU_BUDGET=threads (app/core/topology.py),
+lets each warm up, then releases them together on the same fixtures
+(benchmarks/fixtures.py) and measures:
+  * throughput: cards per second over all workers
+  * p50 / p99 latency per card
+Each card runs decode + detection + OCR (extract_ocr_results). When the models
+can't load here, only decode + audit on the ground-truth text run (CPU-bound
+numpy/cv2 work, still shows oversubscription but not the model cost).
+
+    python -m benchmarks.sweep_topology --workers 1,2,4 --threads 1,2,4 --cards 20
+    python -m benchmarks.sweep_topology --workers 2 --threads 2 --affinity --json runs/topo.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+# --- Worker (one process of a combination) ---
+
+def run_worker(cards, seed):
+    from app.core import topology
+    topology.apply_thread_env()
+
+    from app.core.log import configure_logging
+    from app.utils.image import prepare_image
+    from app.services.auditor import generate_audit_report
+    from benchmarks.bench_stages import load_ml, ground_truth_ocr
+    from benchmarks.fixtures import generate
+
+    configure_logging()
+    info = topology.configure()
+    fixtures = generate(cards, seed=seed)
+    ml, skipped = load_ml()
+    if ml:
+        from app.services.verifier import extract_ocr_results
+
+    def one(fixture):
+        img = prepare_image(fixture.image_bytes)
+        if ml:
+            extract_ocr_results(img)
+        else:
+            generate_audit_report(ground_truth_ocr(fixture), fixture.user_data)
+
+    one(fixtures[0])   # Warm-up
+
+    # Tell the driver we're ready, wait for the common start
+    print("READY", flush=True)
+    sys.stdin.readline()
+
+    latencies = []
+    started = time.time()
+    for fixture in fixtures:
+        t0 = time.perf_counter()
+        one(fixture)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    finished = time.time()
+
+    print("RESULT " + json.dumps({
+        "started": started,
+        "finished": finished,
+        "latencies_ms": latencies,
+        "ml": ml is not None,
+        "ml_skipped": skipped,
+        "topology": info,
+    }), flush=True)
+
+# --- Driver ---
+
+def run_combo(workers, threads, args, workdir):
+    env = dict(os.environ)
+    env.setdefault("YOLO_MODEL_PATH", "models/yolo/best.pt")
+    env.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'sweep.db')}",
+        "WEB_CONCURRENCY": str(workers),
+        "WORKER_CPU_BUDGET": str(threads),
+        "CPU_AFFINITY": str(args.affinity),
+        "CPU_SLOT_DIR": os.path.join(workdir, f"slots-{workers}x{threads}"),
+        "LOG_LEVEL": "WARNING",
+    })
+    # The pools must follow the budget, not whatever the shell exported
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS"):
+        env.pop(var, None)
+
+    cmd = [sys.executable, "-m", "benchmarks.sweep_topology", "--worker",
+           "--cards", str(args.cards), "--seed", str(args.seed)]
+    procs = [subprocess.Popen(cmd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+             for _ in range(workers)]
+
+    def read_tagged(proc, tag):
+        for line in proc.stdout:
+            if line.startswith(tag):
+                return line[len(tag):].strip()
+        raise RuntimeError(f"worker {proc.pid} exited before {tag.strip()}")
+
+    try:
+        for proc in procs:
+            read_tagged(proc, "READY")
+        for proc in procs:
+            proc.stdin.write("go\n")
+            proc.stdin.flush()
+        results = [json.loads(read_tagged(proc, "RESULT ")) for proc in procs]
+    finally:
+        for proc in procs:
+            proc.wait()
+
+    latencies = sorted(ms for r in results for ms in r["latencies_ms"])
+    wall = max(r["finished"] for r in results) - min(r["started"] for r in results)
+    return {
+        "workers": workers,
+        "threads": threads,
+        "oversubscribed": workers * threads > results[0]["topology"]["usable_cores"],
+        "cards": len(latencies),
+        "throughput_per_s": len(latencies) / wall if wall > 0 else 0.0,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 0.99),
+        "ml": results[0]["ml"],
+        "ml_skipped": results[0]["ml_skipped"],
+        "affinity": [r["topology"]["affinity"] for r in results],
+    }
+
+def parse_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4", help="Worker counts to try")
+    parser.add_argument("--threads", default="1,2,4", help="Cores per worker to try")
+    parser.add_argument("--cards", type=int, default=20, help="Fixtures per worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--affinity", action="store_true", help="Also pin workers (CPU_AFFINITY)")
+    parser.add_argument("--json", default=None, help="Write all results here")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.cards, args.seed)
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="sweep_topology_") as workdir:
+        for workers in parse_list(args.workers):
+            for threads in parse_list(args.threads):
+                print(f"[{workers} workers x {threads} threads]", flush=True)
+                rows.append(run_combo(workers, threads, args, workdir))
+
+    if rows and not rows[0]["ml"]:
+        print(f"\nModels not available ({rows[0]['ml_skipped']}): decode + audit only.")
+    print(f"\n{'workers':>8}{'threads':>9}{'cards/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    best = max(rows, key=lambda r: r["throughput_per_s"]) if rows else None
+    for r in rows:
+        flags = ("  oversubscribed" if r["oversubscribed"] else "") + ("  <- best" if r is best else "")
+        print(f"{r['workers']:>8}{r['threads']:>9}{r['throughput_per_s']:>10.2f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{flags}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings (picked up from the working directory, see the Dockerfile).
+
+    WEB_CONCURRENCY=4 gunicorn app.main:app
+    PREFORK_MODELS=True WEB_CONCURRENCY=4 gunicorn app.main:app   # models shared copy-on-write
+
+With PREFORK_MODELS the app is imported and the models are loaded once in the
+master, before the workers are forked (app/core/prefork.py). /health shows
+each worker's unique vs shared memory.
+"""
+from app.core.config import settings
+
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = "0.0.0.0:8000"
+workers = max(1, settings.WEB_CONCURRENCY)
+timeout = 120
+preload_app = settings.PREFORK_MODELS
+
+def when_ready(server):
+    # After the app import, before the first worker is forked
+    if settings.PREFORK_MODELS:
+        from app.core.prefork import load_in_master
+        load_in_master()
+
+def post_fork(server, worker):
+    if settings.PREFORK_MODELS:
+        from app.core.prefork import after_fork
+        after_fork()